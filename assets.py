@@ -0,0 +1,105 @@
+"""
+Optional post-render stage of the dashboard (generate_dashboard.py --optimize-assets)
+
+- minify_html: drops comments, indentation and blank lines of the rendered page.
+  Line breaks are kept inside <script> so JS without semicolons still parses.
+- publish_hashed: copies a static file (chart.js) to assets/<name>.<hash><ext>, a
+  name that can be cached forever since a new content gets a new name.
+- precompress: writes .gz (and .br when the brotli module is installed) siblings
+  for hosts that serve precompressed files. remove_compressed drops them again,
+  a stale sibling would be served in place of the new file.
+"""
+
+import os
+import re
+import glob
+import gzip
+import hashlib
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+ASSET_DIR = "assets"
+
+# Files smaller than this are not worth a compressed copy
+MIN_COMPRESS_SIZE = 1024
+
+BLOCK_PATTERN = re.compile(r'(<script\b[^>]*>.*?</script>|<style\b[^>]*>.*?</style>)', re.S | re.I)
+HTML_COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.S)
+CSS_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.S)
+
+def strip_lines(text):
+	return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+def minify_script(block):
+	# Only whole line // comments are dropped, a // inside a line may be part of a string or url
+	lines = [line.strip() for line in block.splitlines()]
+	return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+def minify_html(html):
+	parts = []
+	for id, part in enumerate(BLOCK_PATTERN.split(html)):
+		# split() with a group: odd parts are the <script>/<style> blocks
+		if id % 2 == 0:
+			part = HTML_COMMENT_PATTERN.sub("", part)
+			part = re.sub(r'>\s+<', '><', strip_lines(part))
+		elif part[:6].lower() == "<style":
+			part = re.sub(r'\s*([{};:,])\s*', r'\1', strip_lines(CSS_COMMENT_PATTERN.sub("", part)))
+		else:
+			part = minify_script(part)
+		parts.append(part)
+	return "".join(parts)
+
+def content_hash(data):
+	return hashlib.sha256(data).hexdigest()[:10]
+
+def publish_hashed(root, path):
+	"""Copy root/path to root/assets/<name>.<hash><ext>, returns the new path relative to root."""
+	with open(os.path.join(root, path), "rb") as f:
+		data = f.read()
+	name, ext = os.path.splitext(os.path.basename(path))
+	hashed_path = f"{ASSET_DIR}/{name}.{content_hash(data)}{ext}"
+
+	out_dir = os.path.join(root, ASSET_DIR)
+	os.makedirs(out_dir, exist_ok=True)
+	# Older builds of the same file are not referenced anymore
+	for old_path in glob.glob(os.path.join(out_dir, f"{name}.*{ext}*")):
+		if not old_path.startswith(os.path.join(root, hashed_path)):
+			os.remove(old_path)
+	with open(os.path.join(root, hashed_path), "wb") as f:
+		f.write(data)
+	return hashed_path
+
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+def remove_compressed(path):
+	"""Remove the .gz/.br siblings of path, returns how many were removed."""
+	removed = 0
+	for suffix in COMPRESSED_SUFFIXES:
+		if os.path.exists(path + suffix):
+			os.remove(path + suffix)
+			removed += 1
+	return removed
+
+def precompress(path):
+	"""Write path.gz and path.br next to path, returns the written files."""
+	with open(path, "rb") as f:
+		data = f.read()
+	if len(data) < MIN_COMPRESS_SIZE:
+		remove_compressed(path)
+		return []
+
+	written = []
+	# mtime=0 keeps the .gz identical between runs when the content did not change
+	with open(path + ".gz", "wb") as f:
+		f.write(gzip.compress(data, compresslevel=9, mtime=0))
+	written.append(path + ".gz")
+	if brotli is not None:
+		with open(path + ".br", "wb") as f:
+			f.write(brotli.compress(data, quality=11))
+		written.append(path + ".br")
+	elif os.path.exists(path + ".br"):
+		os.remove(path + ".br")
+	return written
@@ -0,0 +1,365 @@
+"""
+Local stand-in for the GitHub endpoints the dashboard scan uses
+
+Serves a synthetic org of `--repos` repositories with `--examples` example folders
+each (README.md with the usual shields.io badges, padded to `--readme-size`) and a
+root templates.xml of about `--templates-size` bytes. The REST/GraphQL API is
+served at the root url, raw files under /raw.
+
+	python benchmark/fake_github.py --repos 20 --examples 25 --latency 0.02
+
+Test hooks, not part of the GitHub API:
+	GET  /_stats          requests per endpoint and bytes served since the last reset
+	POST /_reset          zero the counters
+	POST /_push?repos=N   one new commit on the first N repos, changing one README each
+"""
+
+import sys
+import time
+import json
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+OWNER = "bench-org"
+DEFAULT_BRANCH = "main"
+FEATURE_BRANCH = "feature/new-boards"
+APP_TYPES = ["Smart Buildings", "Asset Tracking", "Health", "Smart Home", "Industrial Automation", "Metering"]
+TECHNOLOGIES = ["Bluetooth", "Zigbee", "Matter", "Wi-Fi", "Proprietary"]
+RATE_LIMIT = 5000
+
+def sha(text):
+	return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def blob_sha(text):
+	"""Git blob sha of a file, as the Trees API and GraphQL report it."""
+	content = text.encode("utf-8")
+	return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def repo_name(id):
+	return f"repo_{id:03d}"
+
+def example_name(id):
+	return f"example_{id:03d}"
+
+class FakeOrg:
+	def __init__(self, repos, examples, readme_size, templates_size, app_types=APP_TYPES):
+		self.examples = examples
+		self.readme_size = readme_size
+		self.templates_size = templates_size
+		self.app_types = app_types
+		self.lock = threading.Lock()
+		# repo -> list of (head sha, path changed by that commit), oldest first
+		self.history = {repo_name(id): [(sha(f"{repo_name(id)}@0"), None)] for id in range(repos)}
+		# (repo, path) -> number of commits that touched it
+		self.edits = {}
+		# head sha -> tree response, trees are only built once per commit
+		self.trees = {}
+
+	def has_repo(self, repo):
+		return repo in self.history
+
+	def head(self, repo):
+		return self.history[repo][-1][0]
+
+	def push(self, repo):
+		with self.lock:
+			commits = self.history[repo]
+			path = f"{example_name(len(commits) % self.examples)}/README.md"
+			self.edits[(repo, path)] = self.edits.get((repo, path), 0) + 1
+			commits.append((sha(f"{repo}@{len(commits)}"), path))
+
+	def changed_paths(self, repo, base, head):
+		"""Paths changed between two commits of the repo, None when base is not an ancestor of head."""
+		shas = [commit_sha for commit_sha, path in self.history[repo]]
+		if base not in shas or head not in shas or shas.index(base) > shas.index(head):
+			return None
+		return [path for commit_sha, path in self.history[repo][shas.index(base) + 1:shas.index(head) + 1]]
+
+	def readme(self, repo, folder):
+		id = int(folder.rsplit("_", 1)[1])
+		edit = self.edits.get((repo, f"{folder}/README.md"), 0)
+		lines = [
+			f"# {TECHNOLOGIES[id % len(TECHNOLOGIES)]} - {repo} {folder} #",
+			"![Type badge](https://img.shields.io/badge/Type-Virtual%20Application-green)",
+			f"![Type badge](https://img.shields.io/badge/{self.app_types[id % len(self.app_types)].replace(' ', '%20')}-salmon)",
+			f"![Technology badge](https://img.shields.io/badge/Technology-{TECHNOLOGIES[id % len(TECHNOLOGIES)]}-green)",
+			"![SDK badge](https://img.shields.io/badge/SDK-v2024.12.0-green)",
+			"[![Required board](https://img.shields.io/badge/Mikroe-BUZZ%202%20click-green)](https://www.mikroe.com/buzz-2-click)",
+			"",
+			"## Summary ##",
+			f"Revision {edit}.",
+		]
+		content = "\n".join(lines) + "\n"
+		filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n"
+		while len(content) < self.readme_size:
+			content += filler
+		return content
+
+	def templates(self, repo):
+		entries = []
+		size = 0
+		id = 0
+		while size < self.templates_size or id < self.examples:
+			entry = f'  <descriptors name="{repo}_{id}" label="Example {id}" description="Synthetic example">\n    <properties key="projectFilePaths" value="{example_name(id % self.examples)}/{example_name(id % self.examples)}.slcp"/>\n  </descriptors>\n'
+			entries.append(entry)
+			size += len(entry)
+			id += 1
+		return '<?xml version="1.0" encoding="UTF-8"?>\n<model:MDescriptors xmlns:model="http://www.silabs.com/ss/Studio.ecore">\n' + "".join(entries) + "</model:MDescriptors>\n"
+
+	def paths(self):
+		paths = [f"{example_name(id)}/README.md" for id in range(self.examples)]
+		if self.templates_size > 0:
+			paths.append("templates.xml")
+		return paths
+
+	def file(self, repo, path):
+		"""Content of a file at the head of the repo, None when there is no such file."""
+		if path == "templates.xml" and self.templates_size > 0:
+			return self.templates(repo)
+		folder, _, name = path.partition("/")
+		if name == "README.md" and folder.startswith("example_") and folder[8:].isdigit() and int(folder[8:]) < self.examples:
+			return self.readme(repo, folder)
+		return None
+
+	def tree(self, repo):
+		head = self.head(repo)
+		if head not in self.trees:
+			items = [{'path': example_name(id), 'mode': "040000", 'type': "tree", 'sha': sha(f"{repo}/{example_name(id)}")} for id in range(self.examples)]
+			for path in self.paths():
+				content = self.file(repo, path)
+				items.append({'path': path, 'mode': "100644", 'type': "blob", 'sha': blob_sha(content), 'size': len(content)})
+			self.trees[head] = {'sha': sha(head + "^{tree}"), 'truncated': False, 'tree': sorted(items, key=lambda item: item["path"])}
+		return self.trees[head]
+
+	def branches(self, repo):
+		return [DEFAULT_BRANCH, FEATURE_BRANCH] if int(repo.rsplit("_", 1)[1]) % 2 == 0 else [DEFAULT_BRANCH]
+
+	def metadata(self, repo):
+		target = {'oid': self.head(repo), 'committedDate': "2025-09-01T00:00:00Z", 'tree': {'oid': sha(self.head(repo) + "^{tree}")}}
+		return {
+			'nameWithOwner': f"{OWNER}/{repo}",
+			'defaultBranchRef': {'name': DEFAULT_BRANCH, 'target': target},
+			'latestRelease': {'tagName': "v1.0.0"},
+			# Every other repo has a feature branch, at the same commit as the default branch
+			'refs': {'nodes': [{'name': name, 'target': target} for name in self.branches(repo)]},
+		}
+
+class Stats:
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.reset()
+
+	def reset(self):
+		with self.lock:
+			self.requests = {}
+			self.bytes = 0
+			self.api_requests = 0
+
+	def count(self, endpoint, size=0, api=False):
+		with self.lock:
+			self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+			self.bytes += size
+			if api:
+				self.api_requests += 1
+			return self.api_requests
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+	# Headers and body are separate writes, with Nagle every keep-alive answer waits for a delayed ACK
+	disable_nagle_algorithm = True
+
+	def log_message(self, format, *args):
+		pass
+
+	def send_body(self, status, body, endpoint, content_type="application/json", api=True):
+		server = self.server
+		if isinstance(body, (dict, list)):
+			body = json.dumps(body)
+		data = body.encode("utf-8")
+		etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+		if status == 200 and self.headers.get("If-None-Match") == etag:
+			status, data, endpoint = 304, b"", "not_modified"
+
+		# The test hooks are not part of what is measured
+		api_count = 0 if endpoint.startswith("_") else server.stats.count(endpoint, len(data), api)
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(data)))
+		if status in (200, 304):
+			self.send_header("ETag", etag)
+		if api:
+			self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+			self.send_header("X-RateLimit-Remaining", str(max(RATE_LIMIT - api_count, 0)))
+			self.send_header("X-RateLimit-Reset", str(int(server.started + 3600)))
+			self.send_header("X-RateLimit-Resource", "graphql" if endpoint == "graphql" else "core")
+		self.end_headers()
+		self.wfile.write(data)
+
+	def rate_limited(self):
+		"""Every `rate_limit_every`-th API request gets a secondary rate limit answer."""
+		server = self.server
+		if server.rate_limit_every <= 0:
+			return False
+		with server.lock:
+			server.request_count += 1
+			limited = server.request_count % server.rate_limit_every == 0
+		if not limited:
+			return False
+		data = json.dumps({'message': "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."}).encode("utf-8")
+		server.stats.count("rate_limited", len(data))
+		self.send_response(403)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(data)))
+		self.send_header("Retry-After", str(server.retry_after))
+		self.end_headers()
+		self.wfile.write(data)
+		return True
+
+	def delay(self):
+		server = self.server
+		if server.latency > 0:
+			time.sleep(server.latency * (1 + random.uniform(-server.jitter, server.jitter)))
+
+	def do_GET(self):
+		url = urlsplit(self.path)
+		parts = url.path.strip("/").split("/")
+		org = self.server.org
+
+		if parts == ["_stats"]:
+			stats = self.server.stats
+			with stats.lock:
+				body = {'requests': dict(stats.requests), 'bytes': stats.bytes}
+			return self.send_body(200, body, "_stats", api=False)
+
+		self.delay()
+		if parts[0] == "raw" and len(parts) >= 5 and org.has_repo(parts[2]):
+			# /raw/<owner>/<repo>/<ref>/<path>, the ref may contain slashes (feature/new-boards)
+			# The scan joins an empty examples folder as "/<folder>", raw.githubusercontent.com ignores the extra slash
+			ref_path = parts[3:]
+			if "/".join(ref_path).startswith(FEATURE_BRANCH + "/"):
+				ref_path = ref_path[FEATURE_BRANCH.count("/"):]
+			path = "/".join(part for part in ref_path[1:] if part)
+			content = org.file(parts[2], path)
+			endpoint = "raw_templates" if path.endswith("templates.xml") else "raw_readme" if path.endswith("README.md") else "raw_other"
+			if content is None:
+				return self.send_body(404, "404: Not Found", endpoint, "text/plain", api=False)
+			return self.send_body(200, content, endpoint, "text/plain", api=False)
+
+		# raw.githubusercontent.com has no API quota, only the API answers with rate limits
+		if self.rate_limited():
+			return
+		if parts[0] != "repos" or len(parts) < 3 or not org.has_repo(parts[2]):
+			return self.send_body(404, {'message': "Not Found"}, "not_found")
+		repo = parts[2]
+		rest = parts[3:]
+
+		if rest == []:
+			return self.send_body(200, {'name': repo, 'full_name': f"{OWNER}/{repo}", 'default_branch': DEFAULT_BRANCH}, "repo")
+		if rest == ["commits"]:
+			return self.send_body(200, [{'sha': org.head(repo), 'commit': {'committer': {'date': "2025-09-01T00:00:00Z"}}}], "commits")
+		if rest == ["releases", "latest"]:
+			return self.send_body(200, {'tag_name': "v1.0.0"}, "release")
+		if rest[:2] == ["git", "trees"]:
+			return self.send_body(200, org.tree(repo), "tree")
+		if rest[:1] == ["compare"] and len(rest) == 2 and "..." in rest[1]:
+			base, head = rest[1].split("...", 1)
+			paths = org.changed_paths(repo, base, head)
+			if paths is None:
+				return self.send_body(404, {'message': "Not Found"}, "compare")
+			status = "identical" if not paths else "ahead"
+			return self.send_body(200, {'status': status, 'files': [{'filename': path} for path in paths]}, "compare")
+		if rest[:1] == ["contents"]:
+			folder = "/".join(rest[1:])
+			if folder:
+				return self.send_body(404, {'message': "Not Found"}, "contents")
+			items = [{'name': item["path"], 'path': item["path"], 'type': "dir" if item["type"] == "tree" else "file"}
+				for item in org.tree(repo)["tree"] if "/" not in item["path"]]
+			return self.send_body(200, items, "contents")
+		return self.send_body(404, {'message': "Not Found"}, "not_found")
+
+	def do_POST(self):
+		url = urlsplit(self.path)
+		length = int(self.headers.get("Content-Length", 0))
+		body = self.rfile.read(length) if length else b""
+		server = self.server
+
+		if url.path == "/_reset":
+			server.stats.reset()
+			return self.send_body(200, {}, "_reset", api=False)
+		if url.path == "/_push":
+			count = int(parse_qs(url.query).get("repos", ["1"])[0])
+			for repo in list(server.org.history)[:count]:
+				server.org.push(repo)
+			return self.send_body(200, {}, "_push", api=False)
+
+		self.delay()
+		if self.rate_limited():
+			return
+		if url.path != "/graphql":
+			return self.send_body(404, {'message': "Not Found"}, "not_found")
+
+		variables = json.loads(body).get("variables", {})
+		data = {}
+		# The batched file query: b<i>: object(expression: $e<i>) of repository(owner: $owner, name: $name)
+		if "owner" in variables:
+			repo = variables["name"]
+			if not server.org.has_repo(repo):
+				return self.send_body(200, {'data': {'repository': None}}, "graphql")
+			files = {}
+			for key, expression in variables.items():
+				if not key.startswith("e"):
+					continue
+				content = server.org.file(repo, expression.split(":", 1)[1])
+				files["b" + key[1:]] = None if content is None else {'oid': blob_sha(content), 'isBinary': False, 'isTruncated': False, 'text': content}
+			return self.send_body(200, {'data': {'repository': files}}, "graphql")
+
+		# The aliased metadata query: r<i>: repository(owner: $o<i>, name: $n<i>)
+		for key, repo in variables.items():
+			if not key.startswith("n"):
+				continue
+			alias = "r" + key[1:]
+			data[alias] = server.org.metadata(repo) if server.org.has_repo(repo) else None
+		return self.send_body(200, {'data': data}, "graphql")
+
+def create_server(org, port=0, latency=0.0, jitter=0.0, rate_limit_every=0, retry_after=1):
+	server = ThreadingHTTPServer(("127.0.0.1", port), FakeGithubHandler)
+	server.daemon_threads = True
+	server.org = org
+	server.stats = Stats()
+	server.lock = threading.Lock()
+	server.request_count = 0
+	server.latency = latency
+	server.jitter = jitter
+	server.rate_limit_every = rate_limit_every
+	server.retry_after = retry_after
+	server.started = time.time()
+	return server
+
+def main():
+	parser = argparse.ArgumentParser(description="Fake GitHub server for the dashboard benchmark")
+	parser.add_argument("--port", type=int, default=0, help="Port to listen on, 0 picks a free one")
+	parser.add_argument("--repos", type=int, default=20, help="Number of repositories of the synthetic org")
+	parser.add_argument("--examples", type=int, default=25, help="Example folders per repository")
+	parser.add_argument("--readme-size", type=int, default=4096, help="Size of every README.md in bytes")
+	parser.add_argument("--templates-size", type=int, default=16384, help="Size of templates.xml in bytes, 0 for no templates.xml")
+	parser.add_argument("--app-types", default=",".join(APP_TYPES), help="Comma separated application types of the salmon badges")
+	parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+	parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- share of the latency")
+	parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every N-th request with a secondary rate limit, 0 never")
+	parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds of the rate limit answers")
+	args = parser.parse_args()
+
+	org = FakeOrg(args.repos, args.examples, args.readme_size, args.templates_size, args.app_types.split(","))
+	server = create_server(org, args.port, args.latency, args.jitter, args.rate_limit_every, args.retry_after)
+	print(f"Fake GitHub listening on http://127.0.0.1:{server.server_address[1]}", flush=True)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == "__main__":
+	sys.exit(main())
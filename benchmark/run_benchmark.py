@@ -0,0 +1,215 @@
+"""
+Offline benchmark of the dashboard scan
+
+Starts benchmark/fake_github.py with a synthetic org and runs the real collection
+code of generate_dashboard.py against it, then the aggregation, payloads and render:
+	cold   empty HTTP cache and no snapshots, the nightly job on a fresh runner
+	warm   the cache and snapshots of the cold run, after `--changed-repos` repos
+	       got a new commit (incremental rescan)
+
+For every run it reports the wall time per phase, the requests per endpoint, the
+bytes served and the peak memory, as text and optionally as JSON (--output).
+
+	python benchmark/run_benchmark.py --repos 20 --examples 25 --latency 0.02
+
+With --baseline, a run that makes more requests to an endpoint than the baseline
+JSON (a previous --output) fails the benchmark. Request counts are deterministic,
+wall times are only reported since they depend on the machine.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import resource
+import tracemalloc
+import subprocess
+import contextlib
+import requests
+from jinja2 import Environment, FileSystemLoader
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(bench_dir)
+sys.path.insert(0, root_dir)
+
+import generate_dashboard
+from fake_github import OWNER, repo_name
+from http_cache import HttpCache
+from github_client import GithubClient
+from source_backend import RestBackend
+from instrumentation import Metrics
+from dashboard_payloads import PAYLOAD_DIR, build_payloads, write_payloads
+
+def start_server(args, app_types):
+	command = [
+		sys.executable, os.path.join(bench_dir, "fake_github.py"),
+		"--repos", str(args.repos),
+		"--examples", str(args.examples),
+		"--readme-size", str(args.readme_size),
+		"--templates-size", str(args.templates_size),
+		"--app-types", ",".join(app_types),
+		"--latency", str(args.latency),
+		"--jitter", str(args.jitter),
+		"--rate-limit-every", str(args.rate_limit_every),
+		"--retry-after", str(args.retry_after),
+	]
+	process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+	line = process.stdout.readline()
+	if not line:
+		raise Exception("Fake GitHub server did not start")
+	return process, line.strip().rsplit(" ", 1)[1]
+
+def synthetic_repo_infos(count):
+	return [{
+		'name': f"Benchmark {repo_name(id)}",
+		'tech': "Benchmark",
+		'url': f"https://github.com/{OWNER}/{repo_name(id)}",
+		'examples_folder': "",
+	} for id in range(count)]
+
+def run_scan(args, server_url, cache_dir, snapshots, out_dir, repo_infos, app_infos):
+	"""One full generator run against the fake server, returns the wall time of each phase."""
+	metrics = Metrics()
+	client = GithubClient(None, pool_size=max(16, args.concurrency), cache=HttpCache(cache_dir, 256 * 1024 * 1024),
+		api_url=server_url, raw_url=server_url + "/raw", max_in_flight=args.concurrency, metrics=metrics)
+	generate_dashboard.metrics = metrics
+	generate_dashboard.client = client
+	generate_dashboard.source = RestBackend(client)
+	generate_dashboard.batch_blobs = args.graphql_blobs
+
+	phases = {}
+	start = time.perf_counter()
+	repositories, examples = asyncio.run(generate_dashboard.collect(repo_infos, args.concurrency, snapshots))
+	phases["collect"] = time.perf_counter() - start
+	# Breakdown of collect recorded by the generator itself
+	for name, seconds in metrics.phases.items():
+		phases["collect." + name] = seconds
+
+	start = time.perf_counter()
+	applications = generate_dashboard.got_applications(app_infos, examples)
+	technologies = generate_dashboard.got_technologies(repositories)
+	payloads = build_payloads(repositories, applications, technologies, examples)
+	phases["aggregate"] = time.perf_counter() - start
+
+	start = time.perf_counter()
+	data_version = write_payloads(os.path.join(out_dir, PAYLOAD_DIR), payloads)
+	template = Environment(loader=FileSystemLoader(root_dir)).get_template('template/template.html')
+	output = template.render(payload_dir=PAYLOAD_DIR, data_version=data_version, chart_js="chart.js")
+	with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+		f.write(output)
+	phases["render"] = time.perf_counter() - start
+
+	client.close()
+	return phases, len(examples)
+
+def measure(name, args, server_url, cache_dir, snapshots, out_dir, repo_infos, app_infos):
+	requests.post(server_url + "/_reset")
+	if args.trace_memory:
+		tracemalloc.start()
+	start = time.perf_counter()
+	# The scan prints a line per repo and example, keep the report readable
+	with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+		phases, num_examples = run_scan(args, server_url, cache_dir, snapshots, out_dir, repo_infos, app_infos)
+	wall = time.perf_counter() - start
+
+	result = {
+		'name': name,
+		'wall': round(wall, 3),
+		'phases': {phase: round(seconds, 3) for phase, seconds in phases.items()},
+		'examples': num_examples,
+		# ru_maxrss is in KB on Linux, it is the peak of the whole process so far
+		'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+	}
+	if args.trace_memory:
+		result["peak_traced_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+		tracemalloc.stop()
+
+	stats = requests.get(server_url + "/_stats").json()
+	result["requests"] = dict(sorted(stats["requests"].items()))
+	result["total_requests"] = sum(stats["requests"].values())
+	result["bytes"] = stats["bytes"]
+	return result
+
+def print_result(result):
+	print(f"{result['name']}: {result['wall']:.2f}s wall, {result['total_requests']} requests, {result['bytes'] / 1024:.0f} KB served, {result['examples']} examples")
+	print("  phases:   " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in result["phases"].items()))
+	print("  requests: " + ", ".join(f"{endpoint} {count}" for endpoint, count in result["requests"].items()))
+	memory = f"  memory:   max rss {result['max_rss_kb'] / 1024:.0f} MB"
+	if "peak_traced_kb" in result:
+		memory += f", peak traced {result['peak_traced_kb'] / 1024:.1f} MB"
+	print(memory)
+
+def check_baseline(results, baseline_path):
+	"""Names of the counters that grew compared to the baseline report."""
+	with open(baseline_path, "r") as f:
+		baseline = {run["name"]: run for run in json.load(f)["runs"]}
+
+	regressions = []
+	for result in results:
+		base = baseline.get(result["name"])
+		if base is None:
+			continue
+		if result["total_requests"] > base["total_requests"]:
+			regressions.append(f"{result['name']}: {result['total_requests']} requests, baseline {base['total_requests']}")
+		for endpoint, count in result["requests"].items():
+			if count > base["requests"].get(endpoint, 0):
+				regressions.append(f"{result['name']}: {endpoint} {count} requests, baseline {base['requests'].get(endpoint, 0)}")
+	return regressions
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the dashboard scan against a local fake GitHub")
+	parser.add_argument("--repos", type=int, default=20, help="Number of repositories of the synthetic org")
+	parser.add_argument("--examples", type=int, default=25, help="Example folders per repository")
+	parser.add_argument("--readme-size", type=int, default=4096, help="Size of every README.md in bytes")
+	parser.add_argument("--templates-size", type=int, default=16384, help="Size of templates.xml in bytes, 0 for no templates.xml")
+	parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every request")
+	parser.add_argument("--jitter", type=float, default=0.5, help="Random +/- share of the latency")
+	parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every N-th API request with a secondary rate limit, 0 never")
+	parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds of the rate limit answers")
+	parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of requests in flight")
+	parser.add_argument("--changed-repos", type=int, default=2, help="Repos that get a new commit before the warm run")
+	parser.add_argument("--graphql-blobs", action="store_true", help="Read README.md and templates.xml files by batched GraphQL queries")
+	parser.add_argument("--trace-memory", action="store_true", help="Measure the peak Python allocations with tracemalloc (slower)")
+	parser.add_argument("--output", help="Write the results as JSON to this file")
+	parser.add_argument("--baseline", help="JSON results of a previous run, fail when a run makes more requests")
+	parser.add_argument("--verbose", action="store_true", help="Keep the output of the scan")
+	args = parser.parse_args()
+
+	app_infos = generate_dashboard.load_json("data/application_info.json")
+	app_types = [str(app_info["app_type"]) for app_info in app_infos]
+	repo_infos = synthetic_repo_infos(args.repos)
+
+	process, server_url = start_server(args, app_types)
+	results = []
+	try:
+		with tempfile.TemporaryDirectory() as work_dir:
+			cache_dir = os.path.join(work_dir, "http")
+			snapshots = {}
+			results.append(measure("cold", args, server_url, cache_dir, snapshots, work_dir, repo_infos, app_infos))
+			requests.post(server_url + f"/_push?repos={args.changed_repos}")
+			results.append(measure("warm", args, server_url, cache_dir, snapshots, work_dir, repo_infos, app_infos))
+	finally:
+		process.terminate()
+		process.wait()
+
+	for result in results:
+		print_result(result)
+
+	if args.output:
+		config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "verbose")}
+		with open(args.output, "w") as f:
+			json.dump({'config': config, 'runs': results}, f, indent=2)
+
+	if args.baseline:
+		regressions = check_baseline(results, args.baseline)
+		for regression in regressions:
+			print("Regression:", regression)
+		if regressions:
+			return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Content addressed store of the README.md and templates.xml blobs
+
+Blobs are keyed by their git blob sha, so a file that is byte-identical in a
+production repo and its _staging fork, on two branches, or in two runs is
+downloaded and parsed once. For every blob the store keeps its raw bytes and the
+results derived from it (the README analysis, the templates.xml summary):
+
+	<root>/<sha[:2]>/<sha[2:]>                       raw bytes
+	<root>/<sha[:2]>/<sha[2:]>.<kind>.v<version>.json analysis of that kind
+
+Files are touched when used and pruned after STORE_MAX_AGE without use.
+Without a root directory the store only lives in memory (benchmark, tests).
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from fileutil import write_atomic
+
+# Bumped whenever an analysis changes shape, older results are simply not found
+ANALYSIS_VERSION = 1
+
+STORE_MAX_AGE = 30 * 24 * 3600
+
+def blob_sha(content):
+	"""Git blob sha of bytes, the sha the Trees API reports for the file."""
+	return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+class RecordingStream:
+	"""Binary stream wrapper that keeps a copy of what was read, to store a blob parsed while streaming."""
+	def __init__(self, stream):
+		self.stream = stream
+		self.chunks = []
+
+	def read(self, size=-1):
+		chunk = self.stream.read(size)
+		self.chunks.append(chunk)
+		return chunk
+
+	def getvalue(self):
+		return b"".join(self.chunks)
+
+	def close(self):
+		self.stream.close()
+
+class BlobStore:
+	def __init__(self, root=None):
+		self.root = root
+		self.lock = threading.Lock()
+		# In memory store: (sha, kind) -> value, kind None for the raw bytes
+		self.memory = {}
+		# sha -> lock held while the blob is fetched and analyzed
+		self.claims = {}
+		self.hits = 0
+		self.misses = 0
+
+	def path(self, sha, kind=None):
+		path = os.path.join(self.root, sha[:2], sha[2:])
+		if kind is None:
+			return path
+		return f"{path}.{kind}.v{ANALYSIS_VERSION}.json"
+
+	def load(self, sha, kind):
+		if self.root is None:
+			with self.lock:
+				return self.memory.get((sha, kind))
+		path = self.path(sha, kind)
+		try:
+			with open(path, "rb") as f:
+				data = f.read()
+			os.utime(path)
+		except OSError:
+			return None
+		return data if kind is None else json.loads(data)
+
+	def save(self, sha, kind, value):
+		if self.root is None:
+			with self.lock:
+				self.memory[(sha, kind)] = value
+			return
+		# Concurrent writers of one sha write the same content
+		write_atomic(self.path(sha, kind), value if kind is None else json.dumps(value))
+
+	def claim(self, sha):
+		"""
+		Lock of a sha, to hold while it is fetched and analyzed: concurrent scans of
+		the same blob (one README on several branches) wait and reuse the first result.
+		"""
+		with self.lock:
+			return self.claims.setdefault(sha, threading.Lock())
+
+	def has(self, sha):
+		"""True when the raw bytes of a blob are stored."""
+		if self.root is None:
+			with self.lock:
+				return (sha, None) in self.memory
+		return os.path.exists(self.path(sha))
+
+	def read(self, sha):
+		"""Raw bytes of a blob, None when it was never stored."""
+		return self.load(sha, None)
+
+	def write(self, content, sha=None):
+		"""Store raw bytes, returns their sha."""
+		sha = sha or blob_sha(content)
+		self.save(sha, None, content)
+		return sha
+
+	def analysis(self, sha, kind):
+		"""Stored `kind` analysis of a blob, None when it was never computed."""
+		value = self.load(sha, kind)
+		with self.lock:
+			if value is None:
+				self.misses += 1
+			else:
+				self.hits += 1
+		return value
+
+	def put_analysis(self, sha, kind, value):
+		self.save(sha, kind, value)
+
+	def prune(self, max_age=STORE_MAX_AGE):
+		"""Remove the blobs and analyses not used for max_age seconds, returns how many files went."""
+		if self.root is None or not os.path.isdir(self.root):
+			return 0
+		oldest = time.time() - max_age
+		removed = 0
+		for dir_path, dirs, files in os.walk(self.root):
+			for name in files:
+				path = os.path.join(dir_path, name)
+				try:
+					if os.path.getmtime(path) < oldest:
+						os.remove(path)
+						removed += 1
+				except OSError:
+					pass
+		return removed
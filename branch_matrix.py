@@ -0,0 +1,76 @@
+"""
+Branch matrix of generate_dashboard.py (--branch, --matrix)
+
+Every repo x branch combination is scanned in one run: the branches of all repos
+come from one batched GraphQL query, a repo without the branch falls back to its
+default branch (the result of the default scan is reused, it is not scanned
+again), and the blob store resolves the READMEs a branch did not touch. Each
+branch gets its own dashboard under branches/<name>/ plus its delta against
+the default branches.
+"""
+
+import re
+import fnmatch
+
+BRANCHES_DIR = "branches"
+
+def matching_branches(branches_by_repo, patterns, default_branches):
+	"""Names of the branches matching one of the patterns (globs), default branches left out."""
+	names = set()
+	for repo_name, branches in branches_by_repo.items():
+		for name in branches:
+			if name != default_branches.get(repo_name) and any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+				names.add(name)
+	return sorted(names)
+
+def literal_names(patterns):
+	"""Patterns without glob characters, exact branch names to look up one by one."""
+	return [pattern for pattern in patterns if not any(char in pattern for char in "*?[")]
+
+def branch_metadata(repo_meta, branch_meta, branch):
+	"""Metadata of a repo with its head moved to `branch`, the latest release stays the repo's."""
+	return {**repo_meta, **branch_meta, 'default_branch': branch}
+
+def branch_dir_name(branch):
+	# feature/new-board -> feature-new-board, safe as a single path component
+	return re.sub(r'[^A-Za-z0-9._-]+', "-", branch).strip("-.") or "branch"
+
+def example_key(example, refs):
+	"""(repo url, README path, app type) of an example, the same on every branch."""
+	repo_url, rest = example["example_url"].split("/blob/", 1)
+	ref = refs.get(repo_url)
+	if ref is not None and rest.startswith(ref + "/"):
+		rest = rest[len(ref) + 1:]
+	return (repo_url, rest.lstrip("/"), str(example["app_type"]))
+
+def compute_delta(default_result, branch_result):
+	"""
+	Changes of a branch scan against the default scan:
+		added / removed  examples (per app type) only listed on one side
+		changed          examples listed on both sides with another title or badges
+		repositories     repos whose number of examples differs
+	"""
+	default_examples = {example_key(exp, default_result["refs"]): exp for exp in default_result["examples"]}
+	branch_examples = {example_key(exp, branch_result["refs"]): exp for exp in branch_result["examples"]}
+
+	def summary(exp):
+		return {'example_name': exp["example_name"], 'example_url': exp["example_url"], 'app_type': str(exp["app_type"])}
+
+	changed = []
+	for key in sorted(default_examples.keys() & branch_examples.keys()):
+		old, new = default_examples[key], branch_examples[key]
+		fields = [field for field in ("example_name", "badges") if old.get(field) != new.get(field)]
+		if fields:
+			changed.append({**summary(new), 'fields': fields})
+
+	default_counts = {repo["repo_url"]: repo["num_examples"] for repo in default_result["repositories"]}
+	repositories = [
+		{'repo_url': repo["repo_url"], 'default': default_counts.get(repo["repo_url"]), 'branch': repo["num_examples"]}
+		for repo in branch_result["repositories"] if repo["num_examples"] != default_counts.get(repo["repo_url"])
+	]
+	return {
+		'added': [summary(branch_examples[key]) for key in sorted(branch_examples.keys() - default_examples.keys())],
+		'removed': [summary(default_examples[key]) for key in sorted(default_examples.keys() - branch_examples.keys())],
+		'changed': changed,
+		'repositories': repositories,
+	}
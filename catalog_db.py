@@ -0,0 +1,227 @@
+"""
+SQLite history of the catalog: every run of the generator is stored with its
+repositories, examples and applications, so trends and badge changes can be
+queried without scanning the repositories again.
+
+	python catalog_db.py runs
+	python catalog_db.py trend --app-type "Smart Buildings"
+	python catalog_db.py trend --repo https://github.com/SiliconLabsSoftware/bluetooth_applications
+	python catalog_db.py lost --days 7
+	python catalog_db.py sql "SELECT app_type, COUNT(*) FROM examples WHERE run_id = 3 GROUP BY app_type"
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from datetime import datetime, timedelta, timezone
+
+curdir = os.path.dirname(os.path.abspath(__file__))
+# Kept out of the tracked tree, the nightly commit would add a full copy of the
+# database every day. The workflow carries it from run to run in its .cache and
+# uploads it as an artifact.
+DEFAULT_DB = os.path.join(curdir, ".cache", "catalog.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	started TEXT NOT NULL,
+	branch TEXT NOT NULL DEFAULT 'default',
+	num_repositories INTEGER NOT NULL,
+	num_examples INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS repositories (
+	run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+	repo_url TEXT NOT NULL,
+	repo_name TEXT,
+	tech TEXT,
+	num_examples INTEGER,
+	last_update TEXT,
+	release_ver TEXT,
+	PRIMARY KEY (run_id, repo_url)
+);
+CREATE INDEX IF NOT EXISTS repositories_repo ON repositories (repo_url, run_id);
+CREATE INDEX IF NOT EXISTS repositories_tech ON repositories (tech, run_id);
+CREATE TABLE IF NOT EXISTS examples (
+	run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+	repo_url TEXT NOT NULL,
+	example_name TEXT,
+	example_url TEXT NOT NULL,
+	app_type TEXT NOT NULL,
+	type TEXT,
+	technology TEXT,
+	sdk TEXT,
+	boards TEXT
+);
+CREATE INDEX IF NOT EXISTS examples_run_app_type ON examples (run_id, app_type);
+CREATE INDEX IF NOT EXISTS examples_app_type ON examples (app_type, run_id);
+CREATE INDEX IF NOT EXISTS examples_repo ON examples (repo_url, run_id);
+CREATE INDEX IF NOT EXISTS examples_url ON examples (example_url, run_id);
+CREATE INDEX IF NOT EXISTS examples_technology ON examples (technology, run_id);
+CREATE TABLE IF NOT EXISTS applications (
+	run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+	app_type TEXT NOT NULL,
+	rank INTEGER,
+	num_examples INTEGER NOT NULL,
+	PRIMARY KEY (run_id, app_type)
+);
+CREATE INDEX IF NOT EXISTS applications_app_type ON applications (app_type, run_id);
+"""
+
+def connect(path):
+	os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+	conn = sqlite3.connect(path)
+	conn.row_factory = sqlite3.Row
+	conn.execute("PRAGMA foreign_keys = ON")
+	conn.executescript(SCHEMA)
+	return conn
+
+def example_repo_url(example_url):
+	# https://github.com/<owner>/<repo>/blob/<branch>/<folder>/README.md
+	return example_url.split("/blob/", 1)[0]
+
+def save_run(conn, repositories, examples, applications, branch="default", started=None):
+	"""Store one run, returns its id."""
+	started = started or datetime.now(timezone.utc).isoformat(timespec="seconds")
+	with conn:
+		run_id = conn.execute(
+			"INSERT INTO runs (started, branch, num_repositories, num_examples) VALUES (?, ?, ?, ?)",
+			(started, branch, len(repositories), len(examples)),
+		).lastrowid
+		conn.executemany(
+			"INSERT OR REPLACE INTO repositories VALUES (?, ?, ?, ?, ?, ?, ?)",
+			[(run_id, repo["repo_url"], repo["repo_name"], repo["tech"], repo["num_examples"], str(repo["last_update"]), repo["release_ver"])
+				for repo in repositories],
+		)
+		rows = []
+		for exp in examples:
+			badges = exp.get("badges") or {}
+			rows.append((
+				run_id, example_repo_url(exp["example_url"]), exp["example_name"], exp["example_url"], str(exp["app_type"]),
+				badges.get("type"), badges.get("technology"), badges.get("sdk"), json.dumps(badges.get("boards") or []),
+			))
+		conn.executemany("INSERT INTO examples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+		conn.executemany(
+			"INSERT OR REPLACE INTO applications VALUES (?, ?, ?, ?)",
+			[(run_id, str(app["type"]), app["rank"], app["no_examples"]) for app in applications],
+		)
+	return run_id
+
+def latest_run(conn, branch="default", before=None):
+	query = "SELECT * FROM runs WHERE branch = ?"
+	params = [branch]
+	if before is not None:
+		query += " AND started <= ?"
+		params.append(before)
+	return conn.execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+
+def trend(conn, repo_url=None, app_type=None, tech=None, branch="default", limit=30):
+	"""(started, num_examples) of the last runs, for a repo, an application type, a tech or the whole catalog."""
+	if repo_url is not None:
+		query = "SELECT r.started, p.num_examples FROM runs r JOIN repositories p ON p.run_id = r.id WHERE p.repo_url = ? AND r.branch = ?"
+		params = [repo_url, branch]
+	elif app_type is not None:
+		query = "SELECT r.started, a.num_examples FROM runs r JOIN applications a ON a.run_id = r.id WHERE a.app_type = ? AND r.branch = ?"
+		params = [app_type, branch]
+	elif tech is not None:
+		query = "SELECT r.started, SUM(p.num_examples) FROM runs r JOIN repositories p ON p.run_id = r.id WHERE p.tech = ? AND r.branch = ? GROUP BY r.id"
+		params = [tech, branch]
+	else:
+		query = "SELECT r.started, r.num_examples FROM runs r WHERE r.branch = ?"
+		params = [branch]
+	rows = conn.execute(query + " ORDER BY r.id DESC LIMIT ?", params + [limit]).fetchall()
+	return [tuple(row) for row in reversed(rows)]
+
+def lost_examples(conn, old_run_id, new_run_id):
+	"""
+	Changes from old_run to new_run:
+		removed     (example_url, app_type) listed before and not anymore (app type badge removed or example deleted)
+		lost_type   examples whose Type badge was set before and is gone now
+	"""
+	removed = conn.execute(
+		"""SELECT o.example_name, o.example_url, o.app_type FROM examples o
+		WHERE o.run_id = ? AND NOT EXISTS (
+			SELECT 1 FROM examples n WHERE n.run_id = ? AND n.example_url = o.example_url AND n.app_type = o.app_type)
+		ORDER BY o.app_type, o.example_name""",
+		(old_run_id, new_run_id),
+	).fetchall()
+	lost_type = conn.execute(
+		"""SELECT DISTINCT n.example_name, n.example_url, o.type FROM examples n
+		JOIN examples o ON o.run_id = ? AND o.example_url = n.example_url
+		WHERE n.run_id = ? AND n.type IS NULL AND o.type IS NOT NULL
+		ORDER BY n.example_name""",
+		(old_run_id, new_run_id),
+	).fetchall()
+	return [tuple(row) for row in removed], [tuple(row) for row in lost_type]
+
+def main():
+	parser = argparse.ArgumentParser(description="Query the catalog history")
+	parser.add_argument("--db", default=DEFAULT_DB, help="SQLite file written by generate_dashboard.py")
+	parser.add_argument("--branch", default="default", help="Branch of the runs")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	runs_parser = commands.add_parser("runs", help="List the last runs")
+	runs_parser.add_argument("--limit", type=int, default=20)
+
+	trend_parser = commands.add_parser("trend", help="Number of examples over the last runs")
+	trend_parser.add_argument("--repo", help="Repository url")
+	trend_parser.add_argument("--app-type", help="Application type")
+	trend_parser.add_argument("--tech", help="Technology of the repositories")
+	trend_parser.add_argument("--limit", type=int, default=30)
+
+	lost_parser = commands.add_parser("lost", help="Examples that lost their application type or Type badge")
+	lost_parser.add_argument("--days", type=int, default=7, help="Compare the latest run with the last run at least this many days older")
+
+	sql_parser = commands.add_parser("sql", help="Run a read only SQL query")
+	sql_parser.add_argument("query")
+	args = parser.parse_args()
+
+	if not os.path.exists(args.db):
+		print(f"No catalog database at {args.db}")
+		return 1
+	conn = connect(args.db)
+
+	if args.command == "runs":
+		for row in conn.execute("SELECT * FROM runs WHERE branch = ? ORDER BY id DESC LIMIT ?", (args.branch, args.limit)):
+			print(f"{row['id']:>5}  {row['started']}  {row['num_repositories']} repositories  {row['num_examples']} examples")
+
+	elif args.command == "trend":
+		for started, num_examples in trend(conn, args.repo, args.app_type, args.tech, args.branch, args.limit):
+			print(f"{started}  {num_examples}")
+
+	elif args.command == "lost":
+		new_run = latest_run(conn, args.branch)
+		if new_run is None:
+			print("No runs stored")
+			return 1
+		since = (datetime.fromisoformat(new_run["started"]) - timedelta(days=args.days)).isoformat(timespec="seconds")
+		old_run = latest_run(conn, args.branch, before=since)
+		if old_run is None:
+			print(f"No run older than {args.days} days to compare with")
+			return 1
+		removed, lost_type = lost_examples(conn, old_run["id"], new_run["id"])
+		print(f"Run {old_run['id']} ({old_run['started']}) -> run {new_run['id']} ({new_run['started']})")
+		print(f"{len(removed)} examples no longer listed under an application type:")
+		for name, url, app_type in removed:
+			print(f"  [{app_type}] {name}  {url}")
+		print(f"{len(lost_type)} examples lost their Type badge:")
+		for name, url, old_type in lost_type:
+			print(f"  {name} (was {old_type})  {url}")
+
+	elif args.command == "sql":
+		# Opened read only, a query can not change the history
+		read_only = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+		try:
+			cursor = read_only.execute(args.query)
+		except sqlite3.Error as e:
+			print(f"Query failed: {e}")
+			return 1
+		if cursor.description:
+			print("\t".join(column[0] for column in cursor.description))
+		for row in cursor:
+			print("\t".join("" if value is None else str(value) for value in row))
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Data of the dashboard tabs, written next to index.html as compact JSON
+
+index.html is only the page shell, each tab fetches its payloads the first time
+it is opened:
+	repositories.json   repository table, chart and per technology summary
+	applications.json   application types with their number of examples
+	examples.json       {"app_types": [...], "examples": [[example_name, example_url, app_type id], ...]}
+	                    one flat array grouped by application, the page renders it as a virtual table
+	search/*.json       search index of the examples, see search_index.py
+"""
+
+import os
+import json
+import hashlib
+from search_index import build_search_index
+
+PAYLOAD_DIR = "dashboard"
+
+def build_payloads(repositories, applications, technologies, examples):
+	payloads = {
+		'repositories': {
+			'repositories': repositories,
+			'technologies': [
+				{'tech': tech["tech"], 'repositories': len(tech["repositories"]), 'no_examples': tech["no_examples"]}
+				for tech in technologies
+			],
+		},
+		'applications': [
+			{'type': app["type"], 'rank': app["rank"], 'no_examples': app["no_examples"]}
+			for app in applications
+		],
+		'examples': {
+			'app_types': [str(app["type"]) for app in applications],
+			'examples': [
+				[exp["example_name"], exp["example_url"], app_id]
+				for app_id, app in enumerate(applications)
+				for exp in app["examples"]
+			],
+		},
+	}
+	payloads.update(build_search_index(examples))
+	return payloads
+
+def remove_stale_payloads(out_dir, payloads):
+	"""Remove the .json files under out_dir (and their .gz/.br copies) that are not in payloads, returns how many went."""
+	removed = 0
+	for root, dirs, files in os.walk(out_dir):
+		for file_name in files:
+			path = os.path.join(root, file_name)
+			name = os.path.relpath(path, out_dir).replace(os.sep, "/")
+			for suffix in (".gz", ".br"):
+				if name.endswith(suffix):
+					name = name[:-len(suffix)]
+			# search/<c>.json shards of letters no example title starts with anymore
+			if name.endswith(".json") and name[:-len(".json")] not in payloads:
+				os.remove(path)
+				removed += 1
+	return removed
+
+def write_payloads(out_dir, payloads):
+	"""
+	Write every payload as <out_dir>/<name>.json.
+	Returns a short hash of their content, the page adds it to the payload urls so
+	browsers and the Pages CDN never mix an old payload with a new shell.
+	"""
+	remove_stale_payloads(out_dir, payloads)
+	digest = hashlib.sha256()
+	for name, payload in payloads.items():
+		data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+		digest.update(data)
+		path = os.path.join(out_dir, name + ".json")
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with open(path, "wb") as f:
+			f.write(data)
+	return digest.hexdigest()[:12]
@@ -0,0 +1,18 @@
+"""
+File helpers shared by the caches, the stores and the run reports
+"""
+
+import os
+import threading
+
+def write_atomic(path, data):
+	"""
+	Write text or bytes then rename: readers (textfile collector, a concurrent run)
+	never see half a file, a killed run never leaves one. The temporary name is per
+	thread so concurrent writers of one path do not clash.
+	"""
+	os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+	tmp_path = f"{path}.{threading.get_ident()}.tmp"
+	with open(tmp_path, "wb" if isinstance(data, bytes) else "w") as f:
+		f.write(data)
+	os.replace(tmp_path, path)
@@ -14,23 +14,52 @@ Chart.js không thể vẽ biểu đồ với dữ liệu kiểu chuỗi (string
 """
 
 import os
+import io
 import sys
-import requests
+import shutil
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from jinja2 import Environment, FileSystemLoader
-from github import Github
 from datetime import datetime
-import re
-from collections import Counter
+import posixpath
 import json
+import xml.etree.ElementTree as ET
+from github_graphql import got_repositories_metadata, got_organization_repositories, got_repositories_branches, got_blobs
+from branch_matrix import BRANCHES_DIR, matching_branches, literal_names, branch_metadata, branch_dir_name, compute_delta
+from repo_discovery import matches, merge_repo_infos
+from http_cache import HttpCache
+from github_client import GithubClient, API_URL, RAW_URL
+from git_tree import discover_examples
+from source_backend import RestBackend, GitMirrorBackend
+from readme_analyzer import analyze_readme
+from instrumentation import Metrics, write_report, write_prometheus
+import catalog_db
+from tracing import Tracer
+from assets import minify_html, publish_hashed, precompress, remove_compressed
+from dashboard_payloads import PAYLOAD_DIR, build_payloads, write_payloads
+from templates_xml import read_templates
+from blob_store import BlobStore, RecordingStream, blob_sha
+from sha_cache import ShaCache
+from tree_histogram import read_tree, merge_histograms
+from snapshot import load_snapshots, save_snapshots, scan_fingerprint, unchanged_snapshot, previous_snapshot, build_snapshot, snapshot_key
 
 curdir = os.path.dirname(os.path.abspath(__file__))
 
-PAT_TOKEN = sys.argv[1]
-api_headers = {
-	"Authorization": f"Bearer {PAT_TOKEN}"
-}
-
 excluded = {'.github', 'deprecated', 'doc'}
+
+# Shared GitHub transport (pooled session, PyGithub, HTTP cache), set up by main()
+client = None
+# Phase, repo and request metrics of the run, replaced by main()
+metrics = Metrics()
+# Where files and trees are read from (REST or local git mirrors), set up by main()
+source = None
+# README.md and templates.xml bytes and analyses by blob sha, set up by main()
+blob_store = BlobStore()
+# Batched mode: README.md and templates.xml read by GraphQL, a hundred per query, set up by main()
+batch_blobs = False
+# Extension histograms by tree sha, persisted by main()
+tree_histograms = ShaCache()
 ##################################################################
 
 def split_repo_info(repo_url):
@@ -47,10 +76,10 @@ def got_last_update(repo_url):
 	owner, repo = split_repo_info(repo_url)
 
 	# GitHub API URL to get the latest commits
-	url = f"https://api.github.com/repos/{owner}/{repo}/commits?per_page=1"
+	url = f"{client.api_url}/repos/{owner}/{repo}/commits?per_page=1"
 
 	# Send GET request to GitHub API
-	response = requests.get(url, headers=api_headers)
+	response = client.get(url)
 
 	# Parse JSON response
 	if response.status_code == 200:
@@ -66,47 +95,111 @@ def got_last_update(repo_url):
 		print(url)
 		sys.exit(1)
 
-def count_file_extensions(owner, repo, branch, extension):
-	"""Fetch all file extensions in a GitHub repo using the Git Trees API."""
-	api_url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
-	headers = {'Accept': 'application/vnd.github.v3+json'}
-	response = requests.get(api_url, headers=headers)
-
-	if response.status_code != 200:
-		raise Exception(f"GitHub API error: {response.status_code} - {response.text}")
+def got_tree_listing(owner, repo, ref, recursive=True):
+	"""Extension histogram and direct subtrees of a tree, read as the listing streams in."""
+	stream = source.open_tree(owner, repo, ref, recursive)
+	if stream is None:
+		print("Failed in got_tree_listing() for repo {0} at {1}".format(repo, ref))
+		return None
+	try:
+		with metrics.span("parse tree", "parse", ref=ref):
+			return read_tree(stream)
+	finally:
+		stream.close()
+
+def templates_xml_path(repo):
+	# Energy harvesting keeps its descriptors in a differently named file
+	if repo.find("energy_harvesting_applications") != -1:
+		return "energy_harvesting_templates.xml"
+	return "templates.xml"
+
+def sha_matches(content, sha, name):
+	"""
+	False when fetched bytes are not the blob the tree listed (raw CDN cache, push
+	during the run), such bytes must not be stored under that sha.
+	"""
+	if blob_sha(content) == sha:
+		return True
+	print(f"===> Warning: {name} does not match blob {sha}, not stored")
+	return False
+
+def got_templates_summary(owner, repo, ref, path, sha=None):
+	"""
+	Descriptors of a templates.xml, parsed once per blob sha (blob store).
+	With the sha from the repo tree the file is only downloaded when the store has
+	never seen it, and then parsed as it streams in. Without it the file is read
+	(HTTP cache) and hashed.
+	"""
+	if sha is None:
+		return read_templates_blob(owner, repo, ref, path, None)
+	with blob_store.claim(sha):
+		return read_templates_blob(owner, repo, ref, path, sha)
+
+def read_templates_blob(owner, repo, ref, path, sha):
+	if sha is not None:
+		summary = blob_store.analysis(sha, "templates")
+		if summary is not None:
+			return summary
+		content = blob_store.read(sha)
+		if content is not None:
+			stream = io.BytesIO(content)
+		else:
+			stream = source.open_file(owner, repo, ref, path)
+			if stream is None:
+				return None
+			# The bytes are kept while parsing, for the store
+			stream = RecordingStream(stream)
+	else:
+		contents = source.read_file(owner, repo, ref, path)
+		if contents is None:
+			return None
+		content = contents.encode("utf-8")
+		sha = blob_sha(content)
+		summary = blob_store.analysis(sha, "templates")
+		if summary is not None:
+			return summary
+		blob_store.write(content, sha)
+		stream = io.BytesIO(content)
+
+	try:
+		with metrics.span("parse templates.xml", "parse", path=path):
+			summary = read_templates(stream)
+	except ET.ParseError as e:
+		print(f"===> Error: {owner}/{repo} {path} is not valid XML: {e}")
+		return None
+	finally:
+		stream.close()
+	if isinstance(stream, RecordingStream):
+		if not sha_matches(stream.getvalue(), sha, f"{owner}/{repo} {path}"):
+			return summary
+		blob_store.write(stream.getvalue(), sha)
+	blob_store.put_analysis(sha, "templates", summary)
+	return summary
+
+def got_number_examples(repo_url, scan_in_folder, ref, discovery=None, previous=None, changed_paths=None):
+	owner, repo = split_repo_info(repo_url)
+	templates_path = templates_xml_path(repo)
 
-	data = response.json()
-	files = [item['path'] for item in data.get('tree', []) if item['type'] == 'blob']
-	extensions = [f.split('.')[-1] for f in files if '.' in f]
+	# The repo tree already tells whether templates.xml exists and how many folders there are
+	if discovery is not None and templates_path not in discovery["templates"]:
+		return len(discovery["folders"])
 
-	for ext, count in Counter(extensions).items():
-		# print(f".{ext}: {count}")    
-		if ext == extension:
-			return count
-		
-def got_number_examples(repo_url, scan_in_folder, default_branch):
-	owner, repo = split_repo_info(repo_url)
+	# templates.xml untouched since the previous scan, the count is still valid
+	if discovery is not None and previous is not None and changed_paths is not None and templates_path not in changed_paths:
+		return previous["num_examples"]
 
-	# If repo contain templates.xml then scan .slcp files
-	if repo.find("energy_harvesting_applications") != -1:
-		url = f"https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/energy_harvesting_templates.xml"
-	else:
-		url = f"https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/templates.xml"
-	# print(url)
-	response = requests.get(url, headers=api_headers)
-	if response.status_code == 200:	
-		contents = response.text
-		headers = re.findall(r'.slcp', contents)
-		total_examples = len(headers)
-		
-		return total_examples
+	# If repo contain templates.xml then count its .slcp descriptors
+	templates_sha = discovery["templates"][templates_path] if discovery is not None else None
+	summary = got_templates_summary(owner, repo, ref, templates_path, templates_sha)
+	if summary is not None:
+		return summary["num_examples"]
 
 
 	# If repo did not contain templates.xml
-	url = f"https://api.github.com/repos/{owner}/{repo}/contents/{scan_in_folder}"
+	url = f"{client.api_url}/repos/{owner}/{repo}/contents/{scan_in_folder}"
 
 	# Send GET request to GitHub API
-	response = requests.get(url, headers=api_headers)
+	response = client.get(url)
 
 	# Parse JSON response
 	if response.status_code == 200:
@@ -125,16 +218,23 @@ def got_number_examples(repo_url, scan_in_folder, default_branch):
 		print(url)
 		sys.exit(1)
 
+def got_repo_tree(owner, repo, ref):
+	"""Recursive git tree of a commit/branch, None when it can not be fetched."""
+	tree = source.list_tree(owner, repo, ref)
+	if tree is None:
+		print("Failed in got_repo_tree() for repo {0} at {1}".format(repo, ref))
+	return tree
+
 """
 
 """
 def got_latest_release(repo_url):
 	owner, repo = split_repo_info(repo_url)
 	# GitHub API URL to get the latest release
-	url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
+	url = f"{client.api_url}/repos/{owner}/{repo}/releases/latest"
 
 	# Send GET request to GitHub API
-	response = requests.get(url, headers=api_headers)
+	response = client.get(url)
 
 	# Parse JSON response
 	latest_version = ""
@@ -152,70 +252,98 @@ def got_latest_release(repo_url):
 
 ########################################################################################################
 ########################################################################################################
-repositories = []
-def got_repositories():
-	json_file = os.path.join(curdir, "app/repository_info.json")
-	with open(json_file, "r") as f:
-		json_data = json.load(f)
-
-	for id in range(0, len(json_data)):			
-		# Passing value into dict            
-		repo_url = json_data[id]["url"]
-		scan_in_folder = json_data[id]["examples_folder"]
-		owner, repo = split_repo_info(repo_url)
-		default_branch = got_default_branch(owner, repo)
-		if scan_in_folder != "not_check":
-			num_examples = got_number_examples(repo_url, scan_in_folder, default_branch)
-		else:
-			extension = json_data[id]["extension"]
-			num_examples = count_file_extensions(owner, repo, default_branch, extension)
-
-		last_update = got_last_update(repo_url)
-		release_ver = got_latest_release(repo_url)
-		new_repo = {
-			'no': id,
-			'repo_name': json_data[id]["name"],
-			'repo_url': repo_url,
-			'tech': json_data[id]["tech"],
-			'num_examples': num_examples,
-			'last_update': str(last_update),
-			'release_ver': release_ver,
-		}
-		repositories.append(new_repo)
+async def run_blocking(semaphore, func, *args):
+	"""Run a blocking fetch helper in the worker pool, bounded by the concurrency limit."""
+	async with semaphore:
+		return await asyncio.to_thread(func, *args)
+
+async def tracked(repo_url, stage, coro):
+	"""Await coro as `stage` of a repo, its time and requests are counted for the repo."""
+	with metrics.repo(repo_url, stage):
+		return await coro
+
+async def got_extension_histogram(semaphore, owner, repo, ref, tree_sha=None):
+	"""
+	extension -> number of files in the tree of ref, cached by tree sha.
+	GitHub truncates the recursive listing of very big trees, such a tree is counted
+	from its direct files plus the histograms of its subtrees, walked concurrently.
+	"""
+	if tree_sha is not None:
+		histogram = tree_histograms.get(tree_sha)
+		if histogram is not None:
+			return histogram
+
+	listing = await run_blocking(semaphore, got_tree_listing, owner, repo, ref, True)
+	if listing is None:
+		return None
+	if listing["truncated"]:
+		print(f"Tree of {owner}/{repo} at {ref} truncated, counting its subtrees")
+		root = await run_blocking(semaphore, got_tree_listing, owner, repo, listing["sha"], False)
+		if root is None:
+			return None
+		subtrees = await asyncio.gather(*[got_extension_histogram(semaphore, owner, repo, sha, sha) for path, sha in root["subtrees"]])
+		if any(histogram is None for histogram in subtrees):
+			return None
+		histogram = merge_histograms([root["histogram"]] + subtrees)
+	else:
+		histogram = listing["histogram"]
+	tree_histograms.put(listing["sha"], histogram)
+	return histogram
+
+async def count_file_extensions(semaphore, owner, repo, repo_meta, extension):
+	"""Count the files with an extension in the tree of the scanned commit."""
+	histogram = await got_extension_histogram(semaphore, owner, repo, repo_meta["head_sha"] or repo_meta["default_branch"], repo_meta.get("tree_sha"))
+	if histogram is None:
+		raise Exception(f"Could not list the tree of {owner}/{repo} at {repo_meta['default_branch']}")
+	return histogram.get(extension, 0)
+
+async def got_repository(semaphore, id, repo_info, state):
+	repo_url = repo_info["url"]
+	scan_in_folder = repo_info["examples_folder"]
+	owner, repo = split_repo_info(repo_url)
+	repo_meta = state["meta"]
+	default_branch = repo_meta["default_branch"]
+	if state["unchanged"] is not None:
+		# No commit since the last scan, the count can not have changed
+		num_examples = state["unchanged"]["num_examples"]
+	elif scan_in_folder != "not_check":
+		num_examples = await run_blocking(semaphore, got_number_examples, repo_url, scan_in_folder, repo_meta["head_sha"] or default_branch, state["discovery"], state["previous"], state["changed_paths"])
+	else:
+		extension = repo_info["extension"]
+		num_examples = await count_file_extensions(semaphore, owner, repo, repo_meta, extension)
+
+	new_repo = {
+		'no': id,
+		'repo_name': repo_info["name"],
+		'repo_url': repo_url,
+		'tech': repo_info["tech"],
+		'num_examples': num_examples,
+		'last_update': repo_meta["last_update"],
+		'release_ver': repo_meta["release_ver"],
+	}
+	return new_repo
+
+async def got_repositories(semaphore, repo_infos, states):
+	# Repos are scanned concurrently, the result keeps the order of the json file
+	tasks = [tracked(repo_info["url"], "count", got_repository(semaphore, id, repo_info, states[repo_info["url"]])) for id, repo_info in enumerate(repo_infos)]
+	repositories = await asyncio.gather(*tasks)
+	return list(repositories)
 
 
 ########################################################################################################
 ########################################################################################################
-def got_example_folder(repo_name, scan_in_folder):
-	# Create a GitHub instance (anonymous access for public repos)
-	g = Github()
-
-	# Get the repository
-	repo = g.get_repo(repo_name)
-
-	# Get contents in scan_in_folder directory
-	contents = repo.get_contents(scan_in_folder)
+def got_example_folder(repo_name, scan_in_folder, ref):
+	# Contents API through the shared client: paced by the rate limit scheduler and recorded in the metrics
+	url = f"{client.api_url}/repos/{repo_name}/contents/{scan_in_folder}?ref={ref}"
+	response = client.get(url)
+	if response.status_code != 200:
+		raise Exception(f"Failed in got_example_folder() for {repo_name} with code: {response.status_code}")
 
 	# List folder names
-	
-	folders = [item.name for item in contents if item.type == "dir" and item.name not in excluded]
+	folders = [item["name"] for item in response.json() if item["type"] == "dir" and item["name"] not in excluded]
 	print("Total example:", len(folders))
 	return folders
 
-def get_readme_headers(owner, repo, default_branch, folder):
-	url = f"https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/{folder}/README.md"
-	response = requests.get(url, headers=api_headers)
-	if response.status_code == 200:
-		content = response.text
-		# Extract level 1 headers (lines starting with exactly one '#')
-		headers = re.findall(r'(?m)^# (.+)', content)
-		headers_content = headers[0].replace("#", "")
-		return headers_content
-	else:
-		print("Failed to passing API in get_readme_headers() for: {0}, folder: {1}".format(repo, folder))
-		# print(f"Could not found level 1 headers (#) in README.md from {folder}")
-		sys.exit(1)
-
 # def got_example_title_templates(owner, repo, default_branch, folder):
 # 	# If repo contain templates.xml then scan .slcp files
 # 	if repo.find("energy_harvesting_applications") != -1:
@@ -232,8 +360,8 @@ def get_readme_headers(owner, repo, default_branch, folder):
 # 		return total_examples	
 
 def got_default_branch(owner, repo):
-	url = f"https://api.github.com/repos/{owner}/{repo}"
-	response = requests.get(url, headers=api_headers)
+	url = f"{client.api_url}/repos/{owner}/{repo}"
+	response = client.get(url)
 
 	if response.status_code == 200:
 		data = response.json()
@@ -244,116 +372,622 @@ def got_default_branch(owner, repo):
 		print(f"Failed to passing API in got_default_branch() for repo:", repo)
 		sys.exit(1)
 
-def got_type_shield_io(owner, repo, default_branch, folder):
-	
-	url = f"https://raw.githubusercontent.com/{owner}/{repo}/{default_branch}/{folder}/README.md"
-	# print(url)
-	response = requests.get(url, headers=api_headers)
-	if response.status_code == 200:
-		content = response.text
-		try:
-			headers = re.findall(r'shields.io/badge/(.+?)-salmon', content, re.MULTILINE | re.DOTALL)
-			# Replace %20 with spaces for all matches and return the list
-			shield_types = [header.replace("%20", " ") for header in headers]
-			return shield_types
-		except Exception as e:
-			print(f"Error parsing content: {e}")
-			return []
-	else:
-		print("Failed to passing API in got_type_shield_io() for repo: {0}, folder: {1}".format(repo, folder))
+def got_readme_analysis(owner, repo, ref, folder, sha=None):
+	"""Title and badges of an example, from a single README.md download per blob sha."""
+	if sha is None:
+		return analyze_readme_blob(owner, repo, ref, folder, None)
+	with blob_store.claim(sha):
+		return analyze_readme_blob(owner, repo, ref, folder, sha)
+
+def analyze_readme_blob(owner, repo, ref, folder, sha):
+	content = None
+	if sha is not None:
+		analysis = blob_store.analysis(sha, "readme")
+		if analysis is not None:
+			return analysis
+		content = blob_store.read(sha)
+
+	if content is None:
+		text = source.read_file(owner, repo, ref, folder + "/README.md")
+		if text is None:
+			print("Failed to read README.md in got_readme_analysis() for repo: {0}, folder: {1}".format(repo, folder))
+			return None
+		content = text.encode("utf-8")
+		if sha is None:
+			# Same README in another repo or branch, already analyzed
+			sha = blob_sha(content)
+			analysis = blob_store.analysis(sha, "readme")
+			if analysis is not None:
+				return analysis
+		elif not sha_matches(content, sha, f"{owner}/{repo} {folder}/README.md"):
+			return analyze_readme(text)
+		blob_store.write(content, sha)
+
+	with metrics.span("parse README", "parse", folder=folder):
+		analysis = analyze_readme(content.decode("utf-8", errors="replace"))
+	blob_store.put_analysis(sha, "readme", analysis)
+	return analysis
+
+
+async def got_folder_examples(semaphore, owner, repo, default_branch, folder, readme_sha=None, ref=None):
+	# README read at the scanned commit, the example links to the branch
+	analysis = await run_blocking(semaphore, got_readme_analysis, owner, repo, ref or default_branch, folder, readme_sha)
+	if analysis is None:
+		# README.md could not be read (5xx, 429, timeout): None, not "no examples", so it is retried
+		return None
+	if len(analysis["app_types"]) == 0:
+		# If README.md did not have App Type shield then ignore
 		return []
 
-
-examples = []
-def got_example_shield():
-	json_file = os.path.join(curdir, "app/repository_info.json")
-	with open(json_file, "r") as f:
-		json_data = json.load(f)
-
-	for id in range(0, len(json_data)):			
-		# Passing value into dict            
-		repo_url = json_data[id]["url"]
-		scan_in_folder = json_data[id]["examples_folder"]
-		# repo not follow AEP format so README.md did not have GH Shield
-		if scan_in_folder == "not_check":
-			continue
-
-		owner, repo = split_repo_info(repo_url)
-		repo_name = owner + "/" + repo
-		print(80*"*")
-		print("Checking for:", repo_name)
-
-		default_branch = got_default_branch(owner, repo)
-		print(f"Default branch: {default_branch}")
-		folders = got_example_folder(repo_name, scan_in_folder)
-
+	repo_name = owner + "/" + repo
+	app_url = "https://github.com/" + repo_name + "/blob/" + default_branch + "/" + folder + "/README.md"
+	# A README without level 1 header is still listed, under its folder name
+	example_name = analysis["title"] or posixpath.basename(folder)
+	example_url = app_url
+	# The other badges are kept so new columns do not need another download
+	badges = {key: analysis[key] for key in ("type", "technology", "sdk", "build", "flash", "ram", "boards")}
+
+	folder_examples = []
+	for app_type in analysis["app_types"]:
+		new_example = {
+			'example_name': example_name,
+			'example_url': example_url,
+			'app_type': app_type,
+			'badges': badges,
+		}
+		folder_examples.append(new_example)
+	return folder_examples
+
+def folder_changed(folder, changed_paths):
+	# Only the README.md of a folder is read, other files in it do not change the examples
+	readme_path = posixpath.normpath(folder + "/README.md").lstrip("/")
+	return readme_path in changed_paths
+
+def discovered_folders(scan_in_folder, discovery):
+	"""Example folders of a repo tree, as scan_in_folder + "/" + name, and the blob sha of their README.md."""
+	# Folders without README.md can not carry a shield, no need to probe them
+	folders = [scan_in_folder + "/" + folder["name"] for folder in discovery["folders"] if folder["readme_path"] is not None]
+	readme_shas = {scan_in_folder + "/" + folder["name"]: folder["readme_sha"] for folder in discovery["folders"]}
+	return folders, readme_shas
+
+def reused_folders(folders, state):
+	"""Folders whose README.md did not change since the previous snapshot, with their previous examples."""
+	reused = {}
+	previous = state["previous"]
+	changed_paths = state["changed_paths"]
+	if previous is not None and changed_paths is not None:
 		for folder in folders:
-			if scan_in_folder != None:
-				folder = scan_in_folder + "/" + folder
-
-			list_app_type_shield = got_type_shield_io(owner, repo, default_branch, folder)
-			
-			
-			if len(list_app_type_shield) > 0:
-				readme_header = get_readme_headers(owner, repo, default_branch, folder)
-			else:
-				# If README.md did not have App Type shield then ignore
-				continue
-
-			app_url = "https://github.com/" + repo_name + "/blob/" + default_branch + "/" + folder + "/README.md"
-			example_name = readme_header
-			example_url = app_url
-			
-			for app_type in list_app_type_shield:
-				new_example = {
-					'example_name': example_name,
-					'example_url': example_url,
-					'app_type': app_type
-				}
-				examples.append(new_example)
+			# A folder whose README.md could not be read is scanned again
+			if previous["folders"].get(folder) is not None and not folder_changed(folder, changed_paths):
+				reused[folder] = previous["folders"][folder]
+	return reused
+
+async def prefetch_repo_blobs(semaphore, repo_info, state):
+	"""
+	Batched mode (--graphql-blobs): the README.md and templates.xml blobs a repo scan
+	will read and the blob store lacks are downloaded up front by GraphQL, a hundred
+	per query, instead of one raw request each.
+	"""
+	discovery = state["discovery"]
+	if discovery is None or state["unchanged"] is not None:
+		return
+	owner, repo = split_repo_info(repo_info["url"])
+	folders, readme_shas = discovered_folders(repo_info["examples_folder"], discovery)
+	reused = reused_folders(folders, state)
+	wanted = {posixpath.normpath(folder + "/README.md").lstrip("/"): readme_shas[folder] for folder in folders if folder not in reused}
+	templates_path = templates_xml_path(repo)
+	if templates_path in discovery["templates"]:
+		wanted[templates_path] = discovery["templates"][templates_path]
+
+	paths = [path for path, sha in wanted.items() if not blob_store.has(sha)]
+	if not paths:
+		return
+	repo_meta = state["meta"]
+	blobs = await run_blocking(semaphore, got_blobs, owner, repo, repo_meta["head_sha"] or repo_meta["default_branch"], paths, client)
+	for blob in blobs.values():
+		# Binary or too big for GraphQL: read over REST by the scan
+		if blob["text"] is not None:
+			content = blob["text"].encode("utf-8")
+			# Text GraphQL could not give back byte for byte is read over REST too
+			if blob_sha(content) == blob["sha"]:
+				blob_store.write(content, blob["sha"])
+
+async def got_repo_examples(semaphore, repo_info, state):
+	"""Examples of one repo grouped by example folder."""
+	repo_meta = state["meta"]
+	discovery = state["discovery"]
+	repo_url = repo_info["url"]
+	scan_in_folder = repo_info["examples_folder"]
+	# repo not follow AEP format so README.md did not have GH Shield
+	if scan_in_folder == "not_check":
+		return {}
+
+	owner, repo = split_repo_info(repo_url)
+	repo_name = owner + "/" + repo
+	print(80*"*")
+	if state["unchanged"] is not None:
+		print("Unchanged since last scan:", repo_name)
+		return state["unchanged"]["folders"]
+	print("Checking for:", repo_name)
+
+	default_branch = repo_meta["default_branch"]
+	print(f"Default branch: {default_branch}")
+	readme_shas = {}
+	if discovery is not None:
+		folders, readme_shas = discovered_folders(scan_in_folder, discovery)
+		print("Total example:", len(folders))
+	else:
+		folders = await run_blocking(semaphore, got_example_folder, repo_name, scan_in_folder, repo_meta["head_sha"] or default_branch)
+		if scan_in_folder != None:
+			folders = [scan_in_folder + "/" + folder for folder in folders]
+
+	# Incremental rescan: folders whose README.md did not change keep their previous examples
+	reused = reused_folders(folders, state)
+	if state["previous"] is not None and state["changed_paths"] is not None:
+		print(f"Re-extracting {len(folders) - len(reused)} of {len(folders)} examples")
+
+	scan_folders = [folder for folder in folders if folder not in reused]
+	ref = repo_meta["head_sha"] or default_branch
+	tasks = [got_folder_examples(semaphore, owner, repo, default_branch, folder, readme_shas.get(folder), ref) for folder in scan_folders]
+	scanned = dict(zip(scan_folders, await asyncio.gather(*tasks)))
+	return {folder: reused[folder] if folder in reused else scanned[folder] for folder in folders}
+
+async def got_example_shield(semaphore, repo_infos, states):
+	"""Examples of every repo, grouped by example folder, in the order of the json file."""
+	# Every README of every repo is fetched concurrently
+	tasks = [tracked(repo_info["url"], "examples", got_repo_examples(semaphore, repo_info, states[repo_info["url"]])) for repo_info in repo_infos]
+	return list(await asyncio.gather(*tasks))
 
 ########################################################################################################
 ########################################################################################################
-applications = []
-def got_applications():
-	
-
-	json_file = os.path.join(curdir, "app/application_info.json")
-	with open(json_file, "r") as f:
-		json_data = json.load(f)
-
-	for id in range(0, len(json_data)):	
-		count = 0		
-		# Passing value into dict            
-		app_type = json_data[id]["app_type"]
-		app_rank = json_data[id]["mm_rank"]
-		
-		# Count number example of each application
-		for exp in examples:
-			if exp["app_type"] == str(app_type):
-				count += 1
+def index_examples(examples):
+	"""app_type -> examples, built in one pass so grouping stays linear in the number of examples."""
+	by_app_type = {}
+	for exp in examples:
+		by_app_type.setdefault(exp["app_type"], []).append(exp)
+	return by_app_type
+
+def got_applications(app_infos, examples):
+	by_app_type = index_examples(examples)
+	applications = []
+	for app_info in app_infos:
+		# Passing value into dict
+		app_type = app_info["app_type"]
+		app_rank = app_info["mm_rank"]
+		app_examples = by_app_type.get(str(app_type), [])
 
 		new_app = {
 			'type': app_type,
 			'rank': app_rank,
-			'no_examples': count,
-
+			'no_examples': len(app_examples),
+			'examples': app_examples,
 		}
-		applications.append(new_app)	
+		applications.append(new_app)
+	return applications
+
+def got_technologies(repositories):
+	"""tech -> repositories and their total number of examples, in the order the techs first appear."""
+	technologies = {}
+	for repo in repositories:
+		tech = technologies.setdefault(repo["tech"], {'tech': repo["tech"], 'repositories': [], 'no_examples': 0})
+		tech["repositories"].append(repo)
+		tech["no_examples"] += repo["num_examples"]
+	return list(technologies.values())
 
 ########################################################################################################
 ########################################################################################################
-# Setup Jinja2
-current_dir = os.path.dirname(os.path.abspath(__file__))
-env = Environment(loader=FileSystemLoader(current_dir))
-template = env.get_template('template/template.html')
-
-# Render and save
-got_repositories()
-got_example_shield()
-got_applications()
-output = template.render(repositories=repositories, applications=applications, examples=examples)
-with open(os.path.join(current_dir, 'index.html'), 'w', encoding='utf-8') as f:
-	f.write(output)
-
-print("HTML report generated successfully!")
\ No newline at end of file
+async def got_repo_metadata_rest(semaphore, repo_url):
+	owner, repo = split_repo_info(repo_url)
+	default_branch, last_update, release_ver = await asyncio.gather(
+		run_blocking(semaphore, got_default_branch, owner, repo),
+		run_blocking(semaphore, got_last_update, repo_url),
+		run_blocking(semaphore, got_latest_release, repo_url),
+	)
+	return {
+		'default_branch': default_branch,
+		'head_sha': None,
+		'tree_sha': None,
+		'last_update': str(last_update),
+		'release_ver': release_ver,
+	}
+
+async def got_metadata(semaphore, repo_infos):
+	"""
+	Default branch, last update and latest release of every repo, keyed by repo url.
+	All repos are resolved by one batched GraphQL query, the REST calls are only a fallback.
+	"""
+	repos = [split_repo_info(repo_info["url"]) for repo_info in repo_infos]
+	batched = await run_blocking(semaphore, got_repositories_metadata, repos, client)
+
+	metadata = {}
+	missing = []
+	for repo_info, (owner, repo) in zip(repo_infos, repos):
+		if f"{owner}/{repo}" in batched:
+			metadata[repo_info["url"]] = batched[f"{owner}/{repo}"]
+		else:
+			missing.append(repo_info["url"])
+
+	for repo_url in missing:
+		print("Metadata not resolved by GraphQL, using REST for:", repo_url)
+	results = await asyncio.gather(*[got_repo_metadata_rest(semaphore, repo_url) for repo_url in missing])
+	metadata.update(zip(missing, results))
+	return metadata
+
+async def got_org_repo_infos(concurrency, orgs, topics, name_patterns, with_templates):
+	"""Repositories of the organizations that pass the filters, the orgs are listed concurrently."""
+	semaphore = asyncio.Semaphore(concurrency)
+	results = await asyncio.gather(*[run_blocking(semaphore, got_organization_repositories, org, client) for org in orgs])
+	discovered = []
+	for org, repos in zip(orgs, results):
+		kept = [repo for repo in repos if matches(repo, topics, name_patterns, with_templates)]
+		print(f"Organization {org}: {len(kept)} of {len(repos)} repositories kept")
+		discovered.extend(kept)
+	return discovered
+
+async def update_sources(semaphore, repo_infos, metadata):
+	"""Bring the local mirrors up to date before anything is read (no-op for the REST backend)."""
+	tasks = []
+	for repo_info in repo_infos:
+		owner, repo = split_repo_info(repo_info["url"])
+		tasks.append(tracked(repo_info["url"], "update", run_blocking(semaphore, source.update, owner, repo, metadata[repo_info["url"]]["default_branch"])))
+	await asyncio.gather(*tasks)
+
+async def got_discovery(semaphore, repo_info, repo_meta):
+	scan_in_folder = repo_info["examples_folder"]
+	if scan_in_folder == "not_check":
+		return None
+
+	owner, repo = split_repo_info(repo_info["url"])
+	# The head sha names the exact commit the rest of the scan sees
+	tree = await run_blocking(semaphore, got_repo_tree, owner, repo, repo_meta["head_sha"] or repo_meta["default_branch"])
+	if tree is None or tree.get("truncated"):
+		# Too big for one listing, the per folder scan is used for this repo
+		return None
+	return discover_examples(tree, scan_in_folder, excluded)
+
+async def got_discoveries(semaphore, repo_infos, metadata):
+	"""Example folders, README and templates.xml blobs of every repo from one tree call each, keyed by repo url."""
+	tasks = [tracked(repo_info["url"], "discovery", got_discovery(semaphore, repo_info, metadata[repo_info["url"]])) for repo_info in repo_infos]
+	results = await asyncio.gather(*tasks)
+	return {repo_info["url"]: discovery for repo_info, discovery in zip(repo_infos, results)}
+
+async def got_changes(semaphore, repo_infos, metadata, previous):
+	"""Paths changed since the previously scanned commit of each repo, None where unknown."""
+	tasks = []
+	for repo_info in repo_infos:
+		repo_url = repo_info["url"]
+		owner, repo = split_repo_info(repo_url)
+		tasks.append(tracked(repo_url, "changes", run_blocking(semaphore, source.changed_paths, owner, repo, previous[repo_url]["head_sha"], metadata[repo_url]["head_sha"])))
+	results = await asyncio.gather(*tasks)
+	return {repo_info["url"]: paths for repo_info, paths in zip(repo_infos, results)}
+
+async def scan_repos(semaphore, repo_infos, metadata, snapshots):
+	"""
+	Scan the repositories at the head of metadata[repo_url]["default_branch"].
+	Repos whose head sha matches their entry in `snapshots` are reused as is, repos
+	with an older snapshot only re-extract the examples whose README.md changed.
+	Returns the repositories and the examples of each repo, in repo_infos order.
+	"""
+	unchanged = {}
+	previous = {}
+	for repo_info in repo_infos:
+		repo_url = repo_info["url"]
+		fingerprint = scan_fingerprint(repo_info, excluded)
+		snapshot = unchanged_snapshot(snapshots, repo_url, metadata[repo_url], fingerprint)
+		if snapshot is not None:
+			unchanged[repo_url] = snapshot
+			continue
+		snapshot = previous_snapshot(snapshots, repo_url, metadata[repo_url], fingerprint)
+		if snapshot is not None:
+			previous[repo_url] = snapshot
+	changed_infos = [repo_info for repo_info in repo_infos if repo_info["url"] not in unchanged]
+	print(f"{len(changed_infos)} of {len(repo_infos)} repositories changed since the last scan")
+
+	with metrics.phase("update_sources"):
+		await update_sources(semaphore, changed_infos, metadata)
+	with metrics.phase("discovery"):
+		discoveries, changes = await asyncio.gather(
+			got_discoveries(semaphore, changed_infos, metadata),
+			got_changes(semaphore, [repo_info for repo_info in changed_infos if repo_info["url"] in previous], metadata, previous),
+		)
+
+	# Everything known about a repo before its examples are extracted
+	states = {}
+	for repo_info in repo_infos:
+		repo_url = repo_info["url"]
+		states[repo_url] = {
+			'meta': metadata[repo_url],
+			'discovery': discoveries.get(repo_url),
+			'unchanged': unchanged.get(repo_url),
+			'previous': previous.get(repo_url),
+			'changed_paths': changes.get(repo_url),
+		}
+
+	if batch_blobs:
+		with metrics.phase("prefetch"):
+			await asyncio.gather(*[tracked(repo_info["url"], "prefetch", prefetch_repo_blobs(semaphore, repo_info, states[repo_info["url"]])) for repo_info in repo_infos])
+
+	with metrics.phase("scan"):
+		repositories, repo_folders = await asyncio.gather(
+			got_repositories(semaphore, repo_infos, states),
+			got_example_shield(semaphore, repo_infos, states),
+		)
+
+	repo_examples = []
+	for repo_info, repository, folders in zip(repo_infos, repositories, repo_folders):
+		repo_examples.append([exp for folder_examples in folders.values() if folder_examples is not None for exp in folder_examples])
+		repo_meta = metadata[repo_info["url"]]
+		failed = [folder for folder, folder_examples in folders.items() if folder_examples is None]
+		if failed:
+			# Not snapshotted, the next run scans these folders again (the older snapshot, if any, stays the base)
+			print(f"===> {repo_info['url']}: {len(failed)} README.md could not be read, scan not saved")
+		elif repo_meta["head_sha"]:
+			snapshots[snapshot_key(repo_info["url"], repo_meta["default_branch"])] = build_snapshot(repo_meta, scan_fingerprint(repo_info, excluded), repository["num_examples"], folders)
+	return repositories, repo_examples
+
+async def collect(repo_infos, concurrency, snapshots=None):
+	"""
+	Scan all repositories and their examples concurrently, at their default branch.
+	The snapshots dict is updated with the result of this run.
+	"""
+	# Size the worker pool to the limit so blocking helpers never queue behind each other
+	asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+	semaphore = asyncio.Semaphore(concurrency)
+	if snapshots is None:
+		snapshots = {}
+
+	with metrics.phase("metadata"):
+		metadata = await got_metadata(semaphore, repo_infos)
+	repositories, repo_examples = await scan_repos(semaphore, repo_infos, metadata, snapshots)
+	return repositories, [exp for examples in repo_examples for exp in examples]
+
+async def collect_matrix(repo_infos, concurrency, snapshots, patterns):
+	"""
+	Scan the default branches and every branch matching one of the patterns, all concurrently.
+	A branch is only scanned in the repos that have it, the other repos keep their
+	default branch result. Returns branch -> {repositories, examples, refs}, None
+	for the default branches, refs being the branch each repo was read at.
+	"""
+	asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+	semaphore = asyncio.Semaphore(concurrency)
+
+	repo_names = {repo_info["url"]: "/".join(split_repo_info(repo_info["url"])) for repo_info in repo_infos}
+	with metrics.phase("metadata"):
+		# One batched query lists the branches of every repo, with their heads
+		metadata, branches_by_repo = await asyncio.gather(
+			got_metadata(semaphore, repo_infos),
+			run_blocking(semaphore, got_repositories_branches, [split_repo_info(repo_info["url"]) for repo_info in repo_infos], client, literal_names(patterns)),
+		)
+	default_branches = {repo_names[repo_url]: repo_meta["default_branch"] for repo_url, repo_meta in metadata.items()}
+	branches = matching_branches(branches_by_repo, patterns, default_branches)
+	print(f"Branches matching {', '.join(patterns)}: {', '.join(branches) or 'none'}")
+
+	scans = [scan_repos(semaphore, repo_infos, metadata, snapshots)]
+	branch_repos = {}
+	for branch in branches:
+		infos = [repo_info for repo_info in repo_infos if branch in branches_by_repo.get(repo_names[repo_info["url"]], {})]
+		branch_meta = {
+			repo_info["url"]: branch_metadata(metadata[repo_info["url"]], branches_by_repo[repo_names[repo_info["url"]]][branch], branch)
+			for repo_info in infos
+		}
+		print(f"Branch {branch}: {len(infos)} of {len(repo_infos)} repositories")
+		branch_repos[branch] = [repo_info["url"] for repo_info in infos]
+		scans.append(scan_repos(semaphore, infos, branch_meta, snapshots))
+	results = await asyncio.gather(*scans)
+
+	default_repositories, default_examples = results[0]
+	default_refs = {repo_info["url"]: metadata[repo_info["url"]]["default_branch"] for repo_info in repo_infos}
+	matrix = {None: {
+		'repositories': default_repositories,
+		'examples': [exp for examples in default_examples for exp in examples],
+		'refs': default_refs,
+	}}
+	for branch, (repositories, repo_examples) in zip(branches, results[1:]):
+		scanned = {repo_url: (repository, examples) for repo_url, repository, examples in zip(branch_repos[branch], repositories, repo_examples)}
+		merged = {'repositories': [], 'examples': [], 'refs': {}}
+		for id, repo_info in enumerate(repo_infos):
+			repo_url = repo_info["url"]
+			repository, examples = scanned.get(repo_url, (default_repositories[id], default_examples[id]))
+			# Keep the numbering of the default dashboard
+			merged["repositories"].append({**repository, 'no': id})
+			merged["examples"].extend(examples)
+			merged["refs"][repo_url] = branch if repo_url in scanned else default_refs[repo_url]
+		matrix[branch] = merged
+	return matrix
+
+def load_json(file_name):
+	json_file = os.path.join(curdir, file_name)
+	with open(json_file, "r") as f:
+		return json.load(f)
+
+def write_dashboard(template, out_dir, result, chart_js, root_path="", optimize_assets=False, branch=None, delta=None):
+	"""Payloads and index.html of one dashboard, returns the files written."""
+	# Tab data goes to the payloads, the page itself is only the shell
+	payload_dir = os.path.join(out_dir, PAYLOAD_DIR)
+	with metrics.phase("payloads"):
+		data_version = write_payloads(payload_dir, build_payloads(result["repositories"], result["applications"], result["technologies"], result["examples"]))
+		if delta is not None:
+			with open(os.path.join(out_dir, "delta.json"), "w") as f:
+				json.dump({'branch': branch, **delta}, f, indent=2)
+
+	# Render and save
+	with metrics.phase("render"):
+		output = template.render(payload_dir=PAYLOAD_DIR, data_version=data_version, chart_js=root_path + chart_js, root_path=root_path, branch=branch, delta=delta)
+		if optimize_assets:
+			output = minify_html(output)
+		index_path = os.path.join(out_dir, 'index.html')
+		with open(index_path, 'w', encoding='utf-8') as f:
+			f.write(output)
+
+	outputs = [index_path]
+	outputs += [os.path.join(root, name) for root, dirs, files in os.walk(payload_dir) for name in files if name.endswith(".json")]
+	return outputs
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Generate the Mass Market examples dashboard")
+	parser.add_argument("token", help="GitHub token used for the API calls")
+	parser.add_argument("--repos", default="data/repository_info.json", help="JSON list of the repositories to scan")
+	parser.add_argument("--branch", action="append", default=[], help="Scan this branch (a glob with --matrix), repos without it keep their default branch, can be repeated with --matrix")
+	parser.add_argument("--matrix", action="store_true", help="Scan the default branches and every --branch concurrently, write one dashboard per branch under branches/ with its delta")
+	parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of GitHub requests in flight")
+	parser.add_argument("--cache-dir", default=os.path.join(curdir, ".cache", "http"), help="Directory of the persistent HTTP cache")
+	parser.add_argument("--cache-size", type=int, default=256, help="Maximum size of the HTTP cache in MB")
+	parser.add_argument("--no-cache", action="store_true", help="Do not use the persistent HTTP cache")
+	parser.add_argument("--pool-size", type=int, default=16, help="Keep-alive connections per host of the shared HTTP session")
+	parser.add_argument("--backend", choices=["rest", "git"], default="rest", help="Read repository files over REST or from local git mirrors")
+	parser.add_argument("--mirror-dir", default=os.path.join(curdir, ".cache", "mirrors"), help="Directory of the git mirrors (--backend git)")
+	parser.add_argument("--git-url", default="https://github.com/{owner}/{repo}.git", help="Clone url template of the git mirrors (--backend git)")
+	parser.add_argument("--snapshot-file", default=os.path.join(curdir, ".cache", "snapshots.json"), help="Per repository scan results reused while the head sha is unchanged")
+	parser.add_argument("--blob-store", default=os.path.join(curdir, ".cache", "blobs"), help="README.md and templates.xml blobs and their analyses, keyed by blob sha")
+	parser.add_argument("--tree-cache", default=os.path.join(curdir, ".cache", "tree_histograms.json"), help="File extension histograms, keyed by tree sha")
+	parser.add_argument("--full-scan", action="store_true", help="Ignore the stored snapshots and scan every repository")
+	parser.add_argument("--graphql-blobs", action="store_true", help="Read README.md and templates.xml files by batched GraphQL queries instead of one raw request each (--backend rest)")
+	parser.add_argument("--api-url", default=API_URL, help="Base url of the GitHub REST and GraphQL API")
+	parser.add_argument("--raw-url", default=RAW_URL, help="Base url of the raw repository files")
+	parser.add_argument("--optimize-assets", action="store_true", help="Minify index.html, publish chart.js under a content hashed name and write .gz/.br copies")
+	parser.add_argument("--report", default=os.path.join(curdir, ".cache", "run_report.json"), help="JSON run report: phase, repo and request metrics")
+	parser.add_argument("--prometheus", help="Also write the run metrics to this Prometheus textfile")
+	parser.add_argument("--discover-org", action="append", default=[], help="Also scan the repositories of this GitHub organization, can be repeated")
+	parser.add_argument("--topic", action="append", default=[], help="Keep the discovered repositories with this topic, can be repeated")
+	parser.add_argument("--name-pattern", action="append", default=[], help="Keep the discovered repositories matching this pattern, e.g. '*_applications', can be repeated")
+	parser.add_argument("--with-templates", action="store_true", help="Keep the discovered repositories with a templates.xml at their root")
+	parser.add_argument("--db", default=catalog_db.DEFAULT_DB, help="SQLite history of the runs, queried with catalog_db.py")
+	parser.add_argument("--no-db", action="store_true", help="Do not record the run in the SQLite history")
+	parser.add_argument("--trace", help="Write a Chrome trace (chrome://tracing, Perfetto) of every request, parse and phase to this file")
+	args = parser.parse_args(argv)
+	if len(args.branch) > 1 and not args.matrix:
+		parser.error("several --branch need --matrix")
+	if args.branch and not args.matrix and not literal_names(args.branch):
+		parser.error(f"--branch {args.branch[0]} is a pattern, scan the matching branches with --matrix")
+
+	global client, source, metrics, blob_store, tree_histograms, batch_blobs
+	metrics = Metrics(Tracer() if args.trace else None)
+	response_cache = None
+	if not args.no_cache:
+		response_cache = HttpCache(args.cache_dir, args.cache_size * 1024 * 1024)
+	client = GithubClient(args.token, pool_size=max(args.pool_size, args.concurrency), cache=response_cache, api_url=args.api_url, raw_url=args.raw_url, max_in_flight=args.concurrency, metrics=metrics)
+	if args.backend == "git":
+		source = GitMirrorBackend(args.mirror_dir, args.git_url, args.token)
+	else:
+		source = RestBackend(client)
+		batch_blobs = args.graphql_blobs
+
+	repo_infos = load_json(args.repos)
+	if args.discover_org:
+		with metrics.phase("org_discovery"):
+			discovered = asyncio.run(got_org_repo_infos(args.concurrency, args.discover_org, args.topic, args.name_pattern, args.with_templates))
+		repo_infos = merge_repo_infos(repo_infos, discovered)
+		print(f"{len(repo_infos)} repositories to scan")
+	app_infos = load_json("data/application_info.json")
+
+	snapshots = {} if args.full_scan else load_snapshots(args.snapshot_file)
+	blob_store = BlobStore(args.blob_store)
+	tree_histograms = ShaCache(args.tree_cache)
+	if args.branch:
+		matrix = asyncio.run(collect_matrix(repo_infos, args.concurrency, snapshots, args.branch))
+	else:
+		repositories, examples = asyncio.run(collect(repo_infos, args.concurrency, snapshots))
+		matrix = {None: {'repositories': repositories, 'examples': examples}}
+	save_snapshots(args.snapshot_file, snapshots)
+	blob_store.prune()
+	tree_histograms.save()
+
+	# Dashboards to write: branch (None for the default branches) -> output directory
+	if args.matrix:
+		dashboards = {branch: os.path.join(curdir, BRANCHES_DIR, branch_dir_name(branch)) if branch else curdir for branch in matrix}
+	elif args.branch:
+		# Single test branch: its dashboard replaces the main one, repos without it show their default branch
+		branch = args.branch[0]
+		dashboards = {branch if branch in matrix else None: curdir}
+	else:
+		dashboards = {None: curdir}
+	# Branch each dashboard is recorded under in the history: a single --branch keeps
+	# its name even when no repo has it, its repos must not mix with the default runs
+	history_branches = {branch: branch or "default" for branch in dashboards}
+	if args.branch and not args.matrix:
+		history_branches = {branch: args.branch[0] for branch in dashboards}
+
+	with metrics.phase("aggregate"):
+		for result in matrix.values():
+			result["applications"] = got_applications(app_infos, result["examples"])
+			result["technologies"] = got_technologies(result["repositories"])
+		deltas = {branch: compute_delta(matrix[None], matrix[branch]) for branch in dashboards if branch is not None}
+	for branch, delta in deltas.items():
+		print(f"Branch {branch} vs default: {len(delta['added'])} examples added, {len(delta['removed'])} removed, {len(delta['changed'])} changed")
+
+	if not args.no_db:
+		with metrics.phase("history"):
+			conn = catalog_db.connect(args.db)
+			for branch in dashboards:
+				result = matrix[branch]
+				run_id = catalog_db.save_run(conn, result["repositories"], result["examples"], result["applications"], branch=history_branches[branch])
+				print(f"Run {run_id} ({history_branches[branch]}) recorded in {args.db}")
+			conn.close()
+
+	if response_cache is not None:
+		print(f"HTTP cache: {response_cache.hits} hits (304), {response_cache.misses} misses")
+		metrics.set_counter("cache_hits", response_cache.hits)
+		metrics.set_counter("cache_misses", response_cache.misses)
+		response_cache.evict()
+	scheduler = client.scheduler
+	if scheduler.waited:
+		print(f"Rate limits: waited {scheduler.waited:.0f}s, {scheduler.secondary_hits} secondary limit hits, ended at {scheduler.concurrency} requests in flight")
+	metrics.set_counter("rate_limit_wait_seconds", round(scheduler.waited, 3))
+	metrics.set_counter("secondary_rate_limits", scheduler.secondary_hits)
+	print(f"Blob store: {blob_store.hits} analyses reused, {blob_store.misses} computed")
+	metrics.set_counter("blob_store_hits", blob_store.hits)
+	metrics.set_counter("blob_store_misses", blob_store.misses)
+	metrics.set_counter("repositories", len(repo_infos))
+	metrics.set_counter("examples", sum(len(matrix[branch]["examples"]) for branch in dashboards))
+	metrics.set_counter("branches", len(dashboards))
+	client.close()
+
+	# Setup Jinja2
+	env = Environment(loader=FileSystemLoader(curdir))
+	template = env.get_template('template/template.html')
+	chart_js = publish_hashed(curdir, "chart.js") if args.optimize_assets else "chart.js"
+
+	outputs = []
+	for branch, out_dir in dashboards.items():
+		result = matrix[branch]
+		# Branch pages live below the root, the shared files are one level up per path component
+		root_path = "../" * len(os.path.relpath(out_dir, curdir).split(os.sep)) if out_dir != curdir else ""
+		outputs += write_dashboard(template, out_dir, result, chart_js, root_path, args.optimize_assets, branch, deltas.get(branch))
+
+	if args.matrix:
+		branches_dir = os.path.join(curdir, BRANCHES_DIR)
+		branch_dirs = {os.path.basename(out_dir) for out_dir in dashboards.values() if out_dir != curdir}
+		# Dashboards of branches that are gone or no longer match are removed
+		for name in os.listdir(branches_dir) if os.path.isdir(branches_dir) else []:
+			if name not in branch_dirs and os.path.isdir(os.path.join(branches_dir, name)):
+				shutil.rmtree(os.path.join(branches_dir, name))
+		index = [{'branch': branch, 'path': f"{BRANCHES_DIR}/{branch_dir_name(branch)}/index.html", 'added': len(delta["added"]), 'removed': len(delta["removed"]), 'changed': len(delta["changed"])}
+			for branch, delta in deltas.items()]
+		os.makedirs(branches_dir, exist_ok=True)
+		with open(os.path.join(branches_dir, "index.json"), "w") as f:
+			json.dump(index, f, indent=2)
+
+	if args.optimize_assets:
+		with metrics.phase("assets"):
+			outputs.append(os.path.join(curdir, chart_js))
+			compressed = [path for output_path in outputs for path in precompress(output_path)]
+		print(f"Assets: {len(compressed)} precompressed files")
+	else:
+		# Copies left by an earlier --optimize-assets run would be served instead of the new files
+		removed = sum(remove_compressed(output_path) for output_path in outputs)
+		if removed:
+			print(f"Assets: {removed} stale precompressed files removed")
+
+	report = metrics.report()
+	write_report(args.report, report)
+	if args.prometheus:
+		write_prometheus(args.prometheus, report)
+	if args.trace:
+		print(f"Trace: {metrics.tracer.write(args.trace)} events written to {args.trace}")
+	slowest = sorted(report["repos"].items(), key=lambda item: item[1].get("examples", 0) + item[1].get("count", 0), reverse=True)[:3]
+	print(f"Run report: {args.report} ({report['totals']['requests']} requests, slowest repos: {', '.join(url.rsplit('/', 1)[1] for url, repo in slowest)})")
+
+	print("HTML report generated successfully!")
+
+if __name__ == "__main__":
+	main()
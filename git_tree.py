@@ -0,0 +1,49 @@
+"""
+Example discovery from the recursive git tree of a repository
+
+The Trees API returns every path of a commit in one response, so the example
+folders, their README.md and the templates.xml files (with their blob SHAs)
+can all be worked out locally instead of listing/probing folder by folder.
+"""
+
+import posixpath
+
+def tree_blobs(tree):
+	"""Map path -> blob sha for all files of a tree response."""
+	return {item["path"]: item["sha"] for item in tree.get("tree", []) if item["type"] == "blob"}
+
+def discover_examples(tree, scan_in_folder, excluded):
+	"""
+	Returns a dict with
+		folders:   sub folders of scan_in_folder (excluded names skipped), each with
+		           its name, path and README.md blob sha (None when it has no README.md)
+		templates: path -> blob sha of the *templates.xml files in the repo root
+	"""
+	blobs = tree_blobs(tree)
+	scan_path = scan_in_folder.strip("/")
+
+	folders = []
+	for item in tree.get("tree", []):
+		if item["type"] != "tree":
+			continue
+		parent, name = posixpath.split(item["path"])
+		if parent != scan_path or name in excluded:
+			continue
+		readme_path = posixpath.join(item["path"], "README.md")
+		folders.append({
+			'name': name,
+			'path': item["path"],
+			'readme_path': readme_path if readme_path in blobs else None,
+			'readme_sha': blobs.get(readme_path),
+		})
+
+	templates = {
+		path: sha for path, sha in blobs.items()
+		if "/" not in path and path.endswith("templates.xml")
+	}
+
+	return {
+		'sha': tree.get("sha"),
+		'folders': folders,
+		'templates': templates,
+	}
@@ -0,0 +1,101 @@
+"""
+Shared transport for every GitHub call of the dashboard scripts
+
+One keep-alive requests.Session (sized connection pool, compression, retry with
+backoff on 5xx) is created per run, so the hundreds of fetches reuse their
+TCP+TLS connections instead of opening new ones. Rate limits are handled by
+rate_limit.RateLimitScheduler, which paces the session requests and waits out
+403/429 rate limit answers, the raw file host included.
+"""
+
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from rate_limit import RateLimitScheduler
+from instrumentation import endpoint_type
+
+API_URL = "https://api.github.com"
+RAW_URL = "https://raw.githubusercontent.com"
+
+# Seconds before a request that got no answer is given up (and retried)
+REQUEST_TIMEOUT = 30
+
+class GithubClient:
+	def __init__(self, token=None, pool_size=16, cache=None, api_url=API_URL, raw_url=RAW_URL, max_in_flight=None, metrics=None):
+		self.cache = cache
+		# instrumentation.Metrics, every request is recorded when set
+		self.metrics = metrics
+		# Base urls of the REST/GraphQL API and of the raw files, a local server in the benchmark
+		self.api_url = api_url
+		self.raw_url = raw_url
+		self.scheduler = RateLimitScheduler(max_in_flight or pool_size)
+
+		retry = Retry(
+			total=5,
+			backoff_factor=1,
+			# 403/429 rate limits are left to the scheduler, it knows when the window resets
+			status_forcelist=[500, 502, 503, 504],
+			respect_retry_after_header=False,
+			# GraphQL queries are POSTs but read only, safe to repeat
+			allowed_methods=["GET", "HEAD", "POST"],
+			raise_on_status=False,
+		)
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+		self.session = requests.Session()
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		# gzip/deflate, plus br/zstd when the decoders are installed
+		self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+		if token:
+			self.session.headers["Authorization"] = f"Bearer {token}"
+
+	def resource(self, url):
+		"""Rate limit resource of a url, None for hosts without a quota (raw files)."""
+		if url.startswith(self.raw_url + "/"):
+			return None
+		if url.startswith(self.api_url + "/graphql"):
+			return "graphql"
+		if url.startswith(self.api_url):
+			return "core"
+		return None
+
+	def send(self, method, url, **kwargs):
+		"""Send a request when the scheduler allows it, again after the wait when it was rate limited."""
+		resource = self.resource(url)
+		while True:
+			with self.scheduler.slot(resource):
+				start = time.perf_counter()
+				response = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+				if self.metrics is not None:
+					# A streamed body is not read yet, its size is what the server announced
+					size = int(response.headers.get("Content-Length", 0)) if kwargs.get("stream") else len(response.content)
+					self.metrics.record_request(endpoint_type(url, self.api_url, self.raw_url), response.status_code, start, time.perf_counter() - start, size, url)
+			wait = self.scheduler.observe(resource, response)
+			if wait is None:
+				return response
+			print(f"Rate limited on {resource or 'raw files'} ({response.status_code}), retrying {url} in {wait:.0f}s")
+			time.sleep(wait)
+
+	def session_get(self, url, headers=None):
+		return self.send("GET", url, headers=headers)
+
+	def get(self, url, headers=None):
+		"""GET through the pooled session, answered from the on-disk cache on a 304."""
+		if self.cache is not None:
+			return self.cache.get(url, headers=headers, get=self.session_get)
+		return self.session_get(url, headers=headers)
+
+	def stream(self, url, headers=None):
+		"""GET whose body is read incrementally from response.raw, bypasses the cache."""
+		response = self.send("GET", url, headers=headers, stream=True)
+		# raw is the undecoded socket stream, let urllib3 undo the gzip/br encoding
+		response.raw.decode_content = True
+		return response
+
+	def post(self, url, json=None, headers=None):
+		return self.send("POST", url, json=json, headers=headers)
+
+	def close(self):
+		self.session.close()
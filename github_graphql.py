@@ -0,0 +1,269 @@
+"""
+GitHub GraphQL helpers used by generate_dashboard.py
+
+One aliased query resolves the metadata of many repositories at once, instead of
+calling the REST endpoints (repo, commits, releases/latest) for every repo.
+The repositories of an organization are listed page by page with a cursor, and
+the files of a repo are read a hundred at a time through aliased object lookups.
+"""
+
+import json
+from datetime import datetime
+
+GRAPHQL_PATH = "/graphql"
+
+# GitHub limits the query cost, 50 repositories per query stays far below it
+REPOS_PER_QUERY = 50
+
+REPO_METADATA_FRAGMENT = """
+fragment RepoMetadata on Repository {
+	nameWithOwner
+	defaultBranchRef {
+		name
+		target {
+			... on Commit {
+				oid
+				committedDate
+				tree {
+					oid
+				}
+			}
+		}
+	}
+	latestRelease {
+		tagName
+	}
+}
+"""
+
+def run_query(query, variables, client):
+	response = client.post(client.api_url + GRAPHQL_PATH, json={"query": query, "variables": variables})
+	if response.status_code != 200:
+		raise Exception(f"GitHub GraphQL error: {response.status_code} - {response.text}")
+
+	result = response.json()
+	# Missing repos come back as null data plus an entry in "errors", the caller handles them
+	for error in result.get("errors", []):
+		print("GraphQL:", error.get("message"))
+	return result.get("data") or {}
+
+def build_metadata_query(repos, fragment=REPO_METADATA_FRAGMENT, fragment_name="RepoMetadata"):
+	params = []
+	fields = []
+	variables = {}
+	for id, (owner, repo) in enumerate(repos):
+		params.append(f"$o{id}: String!, $n{id}: String!")
+		fields.append(f"\tr{id}: repository(owner: $o{id}, name: $n{id}) {{ ...{fragment_name} }}")
+		variables[f"o{id}"] = owner
+		variables[f"n{id}"] = repo
+
+	query = "query(" + ", ".join(params) + ") {\n" + "\n".join(fields) + "\n}\n" + fragment
+	return query, variables
+
+# The most recently updated branches of each repo, enough for the feature branches under review
+REPO_BRANCHES_FRAGMENT = """
+fragment RepoBranches on Repository {
+	nameWithOwner
+	refs(refPrefix: "refs/heads/", first: 100, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+		nodes {
+			...BranchHead
+		}
+	}%s
+}
+
+fragment BranchHead on Ref {
+	name
+	target {
+		... on Commit {
+			oid
+			committedDate
+			tree {
+				oid
+			}
+		}
+	}
+}
+"""
+
+def build_branches_fragment(names=()):
+	"""
+	REPO_BRANCHES_FRAGMENT plus an exact ref lookup l<i> per branch name, found
+	however many branches the repo has and however old the branch is.
+	"""
+	lookups = "".join(f"\n\tl{id}: ref(qualifiedName: {json.dumps('refs/heads/' + name)}) {{ ...BranchHead }}" for id, name in enumerate(names))
+	return REPO_BRANCHES_FRAGMENT % lookups
+
+def parse_commit(commit):
+	last_update = ""
+	if commit.get("committedDate"):
+		last_update = str(datetime.fromisoformat(commit["committedDate"].replace("Z", "+00:00")).date())
+	return {
+		'head_sha': commit.get("oid"),
+		'tree_sha': (commit.get("tree") or {}).get("oid"),
+		'last_update': last_update,
+	}
+
+def parse_repo_metadata(node):
+	branch_ref = node.get("defaultBranchRef") or {}
+	head_commit = branch_ref.get("target") or {}
+	latest_release = node.get("latestRelease") or {}
+
+	return {
+		'default_branch': branch_ref.get("name"),
+		**parse_commit(head_commit),
+		'release_ver': latest_release.get("tagName", ""),
+	}
+
+def got_repositories_metadata(repos, client):
+	"""
+	Fetch default branch, head commit and latest release for a list of (owner, repo).
+	Returns a dict keyed by "owner/repo", repos that could not be resolved are left out.
+	"""
+	metadata = {}
+	for start in range(0, len(repos), REPOS_PER_QUERY):
+		batch = repos[start:start + REPOS_PER_QUERY]
+		query, variables = build_metadata_query(batch)
+		data = run_query(query, variables, client)
+
+		for id, (owner, repo) in enumerate(batch):
+			node = data.get(f"r{id}")
+			if node is None or node.get("defaultBranchRef") is None:
+				continue
+			metadata[f"{owner}/{repo}"] = parse_repo_metadata(node)
+
+	return metadata
+
+def got_repositories_branches(repos, client, names=()):
+	"""
+	Branches of a list of (owner, repo), batched like the metadata: the 100 most
+	recent ones, plus the exact branch `names` whatever their age.
+	Returns "owner/repo" -> branch name -> head_sha, tree_sha and last_update.
+	"""
+	fragment = build_branches_fragment(names)
+	branches = {}
+	for start in range(0, len(repos), REPOS_PER_QUERY):
+		batch = repos[start:start + REPOS_PER_QUERY]
+		query, variables = build_metadata_query(batch, fragment, "RepoBranches")
+		data = run_query(query, variables, client)
+
+		for id, (owner, repo) in enumerate(batch):
+			node = data.get(f"r{id}")
+			if node is None:
+				continue
+			refs = (node.get("refs") or {}).get("nodes") or []
+			refs += [node.get(f"l{lookup}") for lookup in range(len(names))]
+			branches[f"{owner}/{repo}"] = {ref["name"]: parse_commit(ref.get("target") or {}) for ref in refs if ref is not None}
+
+	return branches
+
+# 100 is the largest page of a connection
+ORG_REPOS_PER_PAGE = 100
+
+ORG_REPOS_QUERY = """
+query($org: String!, $cursor: String) {
+	organization(login: $org) {
+		repositories(first: %d, after: $cursor, orderBy: {field: NAME, direction: ASC}) {
+			pageInfo {
+				hasNextPage
+				endCursor
+			}
+			nodes {
+				name
+				url
+				isArchived
+				isFork
+				repositoryTopics(first: 20) {
+					nodes {
+						topic {
+							name
+						}
+					}
+				}
+				templates: object(expression: "HEAD:templates.xml") {
+					... on Blob {
+						oid
+					}
+				}
+			}
+		}
+	}
+}
+""" % ORG_REPOS_PER_PAGE
+
+def parse_org_repository(node):
+	topics = (node.get("repositoryTopics") or {}).get("nodes") or []
+	templates = node.get("templates") or {}
+	return {
+		'name': node["name"],
+		'url': node["url"],
+		'archived': node.get("isArchived", False),
+		'fork': node.get("isFork", False),
+		'topics': [topic["topic"]["name"] for topic in topics],
+		'templates_sha': templates.get("oid"),
+	}
+
+def got_organization_repositories(org, client):
+	"""
+	Every repository of an organization, a page of 100 per query.
+	The topics and the templates.xml blob at the root of the default branch come
+	with the page, filtering them needs no call per repository.
+	"""
+	repositories = []
+	cursor = None
+	while True:
+		data = run_query(ORG_REPOS_QUERY, {"org": org, "cursor": cursor}, client)
+		connection = (data.get("organization") or {}).get("repositories")
+		if connection is None:
+			print("Organization not found:", org)
+			break
+		repositories.extend(parse_org_repository(node) for node in connection["nodes"] if node is not None)
+		if not connection["pageInfo"]["hasNextPage"]:
+			break
+		cursor = connection["pageInfo"]["endCursor"]
+	return repositories
+
+# Files per query, a README is a few KB so a batch stays a small response
+BLOBS_PER_QUERY = 100
+
+BLOB_FRAGMENT = """
+fragment BlobText on Blob {
+	oid
+	isBinary
+	isTruncated
+	text
+}
+"""
+
+def build_blobs_query(ref, paths):
+	params = ["$owner: String!", "$name: String!"]
+	fields = []
+	variables = {}
+	for id, path in enumerate(paths):
+		params.append(f"$e{id}: String!")
+		fields.append(f"\t\tb{id}: object(expression: $e{id}) {{ ...BlobText }}")
+		variables[f"e{id}"] = f"{ref}:{path}"
+
+	query = "query(" + ", ".join(params) + ") {\n\trepository(owner: $owner, name: $name) {\n" + "\n".join(fields) + "\n\t}\n}\n" + BLOB_FRAGMENT
+	return query, variables
+
+def got_blobs(owner, repo, ref, paths, client):
+	"""
+	Text and blob sha of many files of one repo at ref, BLOBS_PER_QUERY per query.
+	Returns path -> {'sha', 'text'}. Missing files are left out, binary files and
+	files too big for GraphQL come back with text None, to be read over REST.
+	"""
+	blobs = {}
+	for start in range(0, len(paths), BLOBS_PER_QUERY):
+		batch = paths[start:start + BLOBS_PER_QUERY]
+		query, variables = build_blobs_query(ref, batch)
+		data = run_query(query, {"owner": owner, "name": repo, **variables}, client)
+		repository = data.get("repository") or {}
+
+		for id, path in enumerate(batch):
+			node = repository.get(f"b{id}")
+			if node is None or "oid" not in node:
+				continue
+			text = None if node.get("isBinary") or node.get("isTruncated") else node.get("text")
+			blobs[path] = {'sha': node["oid"], 'text': text}
+
+	return blobs
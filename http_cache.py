@@ -0,0 +1,143 @@
+"""
+Persistent HTTP cache for the GitHub fetch helpers
+
+Every cached response keeps its ETag / Last-Modified, the next request for the
+same url is sent as a conditional request and a 304 is answered from disk.
+GitHub does not count 304 responses against the rate limit.
+
+Layout of the cache directory (can be saved/restored by actions/cache):
+	<cache_dir>/<key[:2]>/<key>.body   raw response body
+	<cache_dir>/<key[:2]>/<key>.json   url, validators, encoding, size, last use
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+from fileutil import write_atomic
+
+class HttpCache:
+	def __init__(self, cache_dir, max_size):
+		self.cache_dir = cache_dir
+		self.max_size = max_size
+		self.lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		# key -> (size, last use), loaded once so eviction does not need to rescan the disk
+		self.index = {}
+		self.load_index()
+
+	def load_index(self):
+		if not os.path.isdir(self.cache_dir):
+			return
+		for sub_dir in os.listdir(self.cache_dir):
+			sub_path = os.path.join(self.cache_dir, sub_dir)
+			if not os.path.isdir(sub_path):
+				continue
+			for file_name in os.listdir(sub_path):
+				if not file_name.endswith(".json"):
+					continue
+				meta = self.read_meta(file_name[:-len(".json")])
+				if meta is not None:
+					self.index[meta["key"]] = (meta["size"], meta["used"])
+
+	def cache_key(self, url, ref=None):
+		return hashlib.sha256(f"{ref or ''}\n{url}".encode("utf-8")).hexdigest()
+
+	def entry_path(self, key, suffix):
+		return os.path.join(self.cache_dir, key[:2], key + suffix)
+
+	def read_meta(self, key):
+		try:
+			with open(self.entry_path(key, ".json"), "r") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return None
+
+	def build_response(self, url, body, meta):
+		response = requests.Response()
+		response.status_code = 200
+		response.url = url
+		response._content = body
+		response.encoding = meta.get("encoding")
+		response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+		return response
+
+	def get(self, url, headers=None, ref=None, get=requests.get):
+		"""
+		GET url through the cache, returns a requests.Response.
+		`ref` is added to the key when the url itself does not name the branch.
+		"""
+		key = self.cache_key(url, ref)
+		meta = self.read_meta(key)
+		request_headers = dict(headers or {})
+		if meta is not None:
+			if meta.get("etag"):
+				request_headers["If-None-Match"] = meta["etag"]
+			if meta.get("last_modified"):
+				request_headers["If-Modified-Since"] = meta["last_modified"]
+
+		response = get(url, headers=request_headers)
+
+		if response.status_code == 304 and meta is not None:
+			try:
+				with open(self.entry_path(key, ".body"), "rb") as f:
+					body = f.read()
+			except OSError:
+				# Body lost, ask again without validators
+				return get(url, headers=headers)
+			meta["used"] = time.time()
+			write_atomic(self.entry_path(key, ".json"), json.dumps(meta))
+			with self.lock:
+				self.hits += 1
+				self.index[key] = (meta["size"], meta["used"])
+			return self.build_response(url, body, meta)
+
+		with self.lock:
+			self.misses += 1
+		if response.status_code == 200:
+			self.store(key, url, response)
+		return response
+
+	def store(self, key, url, response):
+		etag = response.headers.get("ETag")
+		last_modified = response.headers.get("Last-Modified")
+		if not etag and not last_modified:
+			return
+
+		body = response.content
+		meta = {
+			'key': key,
+			'url': url,
+			'etag': etag,
+			'last_modified': last_modified,
+			'encoding': response.encoding,
+			'headers': {name: value for name, value in response.headers.items() if name.lower() == "content-type"},
+			'size': len(body),
+			'used': time.time(),
+		}
+		write_atomic(self.entry_path(key, ".body"), body)
+		write_atomic(self.entry_path(key, ".json"), json.dumps(meta))
+		with self.lock:
+			self.index[key] = (meta["size"], meta["used"])
+
+	def evict(self):
+		"""Drop the least recently used entries until the cache fits in max_size bytes."""
+		with self.lock:
+			total_size = sum(size for size, used in self.index.values())
+			if total_size <= self.max_size:
+				return
+
+			for key, (size, used) in sorted(self.index.items(), key=lambda item: item[1][1]):
+				for suffix in (".body", ".json"):
+					try:
+						os.remove(self.entry_path(key, suffix))
+					except OSError:
+						pass
+				del self.index[key]
+				total_size -= size
+				if total_size <= self.max_size:
+					break
@@ -0,0 +1,222 @@
+"""
+Run metrics of the dashboard generator
+
+Metrics records the wall time of every phase and of every repo, and each HTTP
+request of GithubClient (count, errors, bytes, latency histogram) per endpoint
+type. Requests are attributed to the repo being scanned through a context
+variable: asyncio.to_thread copies the context, so a request made by a worker
+thread counts for the repo whose coroutine started it.
+
+The result is written as a JSON run report and optionally as a Prometheus
+textfile (node_exporter textfile collector format). With a tracing.Tracer the
+phases, repo stages, requests and parse steps are also recorded as trace spans.
+"""
+
+import re
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from fileutil import write_atomic
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+
+current_repo = contextvars.ContextVar("current_repo", default=None)
+
+API_ENDPOINTS = [
+	('graphql', re.compile(r'^/graphql')),
+	('tree', re.compile(r'^/repos/[^/]+/[^/]+/git/trees/')),
+	('compare', re.compile(r'^/repos/[^/]+/[^/]+/compare/')),
+	('contents', re.compile(r'^/repos/[^/]+/[^/]+/contents(/|$)')),
+	('commits', re.compile(r'^/repos/[^/]+/[^/]+/commits')),
+	('release', re.compile(r'^/repos/[^/]+/[^/]+/releases/')),
+	('repo', re.compile(r'^/repos/[^/]+/[^/]+/?$')),
+]
+
+def endpoint_type(url, api_url, raw_url):
+	"""Short name of the endpoint of a url, the label of its request metrics."""
+	path = url.split("?", 1)[0]
+	if path.startswith(raw_url + "/"):
+		if path.endswith("templates.xml"):
+			return "raw_templates"
+		return "raw_readme" if path.endswith("README.md") else "raw_other"
+	if path.startswith(api_url):
+		path = path[len(api_url):]
+		for name, pattern in API_ENDPOINTS:
+			if pattern.match(path):
+				return name
+		return "api_other"
+	return "other"
+
+class EndpointStats:
+	def __init__(self):
+		self.count = 0
+		self.errors = 0
+		self.bytes = 0
+		self.seconds = 0.0
+		self.buckets = [0] * len(LATENCY_BUCKETS)
+
+	def add(self, status, seconds, size):
+		self.count += 1
+		# 304 is a cache revalidation, not an error
+		if status >= 400:
+			self.errors += 1
+		self.bytes += size
+		self.seconds += seconds
+		for id, bound in enumerate(LATENCY_BUCKETS):
+			if seconds <= bound:
+				self.buckets[id] += 1
+				break
+
+	def report(self):
+		cumulative = 0
+		histogram = {}
+		for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+			cumulative += count
+			histogram["+Inf" if bound == float("inf") else str(bound)] = cumulative
+		return {
+			'count': self.count,
+			'errors': self.errors,
+			'bytes': self.bytes,
+			'seconds': round(self.seconds, 3),
+			'histogram': histogram,
+		}
+
+class Metrics:
+	def __init__(self, tracer=None):
+		self.tracer = tracer
+		self.lock = threading.Lock()
+		self.started = time.time()
+		self.phases = {}
+		# repo url -> {stage: seconds, 'requests': n, 'bytes': n}
+		self.repos = {}
+		self.endpoints = {}
+		self.counters = {}
+
+	@contextmanager
+	def phase(self, name):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			seconds = time.perf_counter() - start
+			self.phases[name] = self.phases.get(name, 0) + seconds
+			if self.tracer is not None:
+				self.tracer.add(name, "phase", start, seconds, track="phases")
+
+	@contextmanager
+	def repo(self, repo_url, stage):
+		"""Time `stage` of a repo, requests made inside are counted for that repo."""
+		token = current_repo.set(repo_url)
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			seconds = time.perf_counter() - start
+			current_repo.reset(token)
+			with self.lock:
+				repo = self.repos.setdefault(repo_url, {'requests': 0, 'bytes': 0})
+				repo[stage] = repo.get(stage, 0) + seconds
+			if self.tracer is not None:
+				self.tracer.add(stage, "repo", start, seconds, track=repo_url)
+
+	@contextmanager
+	def span(self, name, category, **args):
+		"""Trace span of a step (parse, render), nothing is recorded without a tracer."""
+		if self.tracer is None:
+			yield
+			return
+		repo_url = current_repo.get()
+		if repo_url is not None:
+			args["repo"] = repo_url
+		with self.tracer.span(name, category, **args):
+			yield
+
+	def record_request(self, endpoint, status, start, seconds, size, url):
+		repo_url = current_repo.get()
+		if self.tracer is not None:
+			self.tracer.add(endpoint, "http", start, seconds, args={'url': url, 'status': status, 'bytes': size, 'repo': repo_url})
+		with self.lock:
+			self.endpoints.setdefault(endpoint, EndpointStats()).add(status, seconds, size)
+			if repo_url is not None:
+				repo = self.repos.setdefault(repo_url, {'requests': 0, 'bytes': 0})
+				repo["requests"] += 1
+				repo["bytes"] += size
+
+	def set_counter(self, name, value):
+		self.counters[name] = value
+
+	def report(self):
+		endpoints = {name: stats.report() for name, stats in sorted(self.endpoints.items())}
+		hits = self.counters.get("cache_hits", 0)
+		misses = self.counters.get("cache_misses", 0)
+		return {
+			'started': self.started,
+			'duration': round(time.time() - self.started, 3),
+			'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+			'repos': {
+				url: {key: round(value, 3) if isinstance(value, float) else value for key, value in repo.items()}
+				for url, repo in self.repos.items()
+			},
+			'requests': endpoints,
+			'totals': {
+				'requests': sum(stats["count"] for stats in endpoints.values()),
+				'errors': sum(stats["errors"] for stats in endpoints.values()),
+				'bytes': sum(stats["bytes"] for stats in endpoints.values()),
+			},
+			'cache': {
+				'hits': hits,
+				'misses': misses,
+				'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+			},
+			'counters': self.counters,
+		}
+
+def write_report(path, report):
+	write_atomic(path, json.dumps(report, indent=2))
+
+def prometheus_label(value):
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def write_prometheus(path, report, prefix="repository_catalog"):
+	lines = []
+	def metric(name, kind, help, samples):
+		lines.append(f"# HELP {prefix}_{name} {help}")
+		lines.append(f"# TYPE {prefix}_{name} {kind}")
+		for labels, value in samples:
+			label_text = ",".join(f'{key}="{prometheus_label(label)}"' for key, label in labels.items())
+			lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+	metric("run_timestamp_seconds", "gauge", "Start time of the last run.", [({}, report["started"])])
+	metric("run_duration_seconds", "gauge", "Wall time of the last run.", [({}, report["duration"])])
+	metric("phase_duration_seconds", "gauge", "Wall time of each phase of the last run.",
+		[({'phase': name}, seconds) for name, seconds in report["phases"].items()])
+
+	repo_stages = [(url, stage, value) for url, repo in report["repos"].items() for stage, value in repo.items() if stage not in ("requests", "bytes")]
+	metric("repo_duration_seconds", "gauge", "Wall time spent on each repo, per stage.",
+		[({'repo': url, 'stage': stage}, value) for url, stage, value in repo_stages])
+	metric("repo_requests", "gauge", "HTTP requests made for each repo.",
+		[({'repo': url}, repo["requests"]) for url, repo in report["repos"].items()])
+
+	endpoints = report["requests"].items()
+	metric("requests_total", "counter", "HTTP requests per endpoint.", [({'endpoint': name}, stats["count"]) for name, stats in endpoints])
+	metric("request_errors_total", "counter", "HTTP answers >= 400 per endpoint.", [({'endpoint': name}, stats["errors"]) for name, stats in endpoints])
+	metric("response_bytes_total", "counter", "Response body bytes per endpoint.", [({'endpoint': name}, stats["bytes"]) for name, stats in endpoints])
+
+	lines.append(f"# HELP {prefix}_request_duration_seconds Latency of the HTTP requests per endpoint.")
+	lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+	for name, stats in endpoints:
+		for bound, count in stats["histogram"].items():
+			lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{prometheus_label(name)}",le="{bound}"}} {count}')
+		lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{prometheus_label(name)}"}} {stats["seconds"]}')
+		lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{prometheus_label(name)}"}} {stats["count"]}')
+
+	metric("cache_hits_total", "counter", "Requests answered from the HTTP cache (304).", [({}, report["cache"]["hits"])])
+	metric("cache_misses_total", "counter", "Requests not answered from the HTTP cache.", [({}, report["cache"]["misses"])])
+	for name, value in report["counters"].items():
+		if name not in ("cache_hits", "cache_misses"):
+			metric(name, "gauge", f"{name.replace('_', ' ').capitalize()} of the last run.", [({}, value)])
+
+	write_atomic(path, "\n".join(lines) + "\n")
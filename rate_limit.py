@@ -0,0 +1,171 @@
+"""
+Rate limit aware scheduling of the GitHub requests
+
+Every request of GithubClient goes through RateLimitScheduler:
+- a token bucket per rate limit resource (core, graphql) paces the requests. It runs
+  at the secondary limit guidance (~15 requests/s) while there is headroom, and
+  spreads the remaining quota until the reset once it gets low.
+- the number of requests in flight adapts: it grows while the quota has headroom,
+  is halved when GitHub answers with a secondary rate limit and drops when the
+  quota runs low.
+- a rate limited answer (403/429) is not returned to the caller, the request
+  waits for Retry-After / X-RateLimit-Reset and is sent again. Hosts without a
+  quota (raw files) are not paced, but their 429 answers are waited out too.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+# GitHub allows about 900 points per minute on REST before the secondary limit kicks in
+DEFAULT_RATE = 15.0
+DEFAULT_BURST = 30
+# Below this share of the quota, requests are spread over the time left until the reset
+LOW_HEADROOM = 0.2
+# Above this share of the quota, the concurrency may grow again
+HIGH_HEADROOM = 0.5
+# GitHub asks to wait at least a minute after a secondary rate limit without Retry-After
+SECONDARY_WAIT = 60
+
+class TokenBucket:
+	def __init__(self, rate, burst):
+		self.rate = rate
+		self.burst = burst
+		self.tokens = burst
+		self.updated = time.monotonic()
+
+	def refill(self, now):
+		self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def reserve(self, now):
+		"""Take one token, returns how long the caller has to wait for it."""
+		self.refill(now)
+		self.tokens -= 1
+		if self.tokens >= 0:
+			return 0
+		return -self.tokens / self.rate
+
+class RateLimitScheduler:
+	def __init__(self, max_concurrency, min_concurrency=1, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+		self.max_concurrency = max_concurrency
+		self.min_concurrency = min_concurrency
+		self.concurrency = max_concurrency
+		self.in_flight = 0
+		self.default_rate = rate
+		self.burst = burst
+		self.condition = threading.Condition()
+		self.buckets = {}
+		# resource -> (remaining, limit, reset epoch) from the last response headers
+		self.limits = {}
+		# No request of a resource is sent before this time (monotonic) after a rate limit answer
+		self.blocked_until = {}
+		self.secondary_hits = 0
+		self.waited = 0.0
+
+	def bucket(self, resource):
+		if resource not in self.buckets:
+			self.buckets[resource] = TokenBucket(self.default_rate, self.burst)
+		return self.buckets[resource]
+
+	@contextmanager
+	def slot(self, resource):
+		"""Hold one of the adaptive concurrency slots while a request of `resource` is sent."""
+		with self.condition:
+			while self.in_flight >= self.concurrency:
+				self.condition.wait()
+			self.in_flight += 1
+		try:
+			if resource is not None:
+				self.pace(resource)
+			yield
+		finally:
+			with self.condition:
+				self.in_flight -= 1
+				self.condition.notify_all()
+
+	def pace(self, resource):
+		with self.condition:
+			now = time.monotonic()
+			delay = max(self.blocked_until.get(resource, 0) - now, 0)
+			delay = max(delay, self.bucket(resource).reserve(now))
+		if delay > 0:
+			time.sleep(delay)
+
+	def observe(self, resource, response):
+		"""
+		Update the limits from the response headers.
+		Returns the seconds to wait before sending the request again when it was rate limited, else None.
+		"""
+		if resource is None:
+			wait = self.unmetered_wait(response)
+			if wait is not None:
+				with self.condition:
+					self.waited += wait
+			return wait
+
+		headers = response.headers
+		remaining = headers.get("X-RateLimit-Remaining")
+		limit = headers.get("X-RateLimit-Limit")
+		reset = headers.get("X-RateLimit-Reset")
+		resource = headers.get("X-RateLimit-Resource", resource)
+
+		with self.condition:
+			if remaining is not None and limit is not None and reset is not None:
+				self.limits[resource] = (int(remaining), int(limit), int(reset))
+				self.adapt(resource)
+
+			wait = self.rate_limit_wait(resource, response)
+			if wait is not None:
+				self.blocked_until[resource] = time.monotonic() + wait
+				self.waited += wait
+			return wait
+
+	def unmetered_wait(self, response):
+		"""Wait asked by a 429 of a host without X-RateLimit headers, None for any other answer."""
+		if response.status_code != 429:
+			return None
+		retry_after = response.headers.get("Retry-After", "")
+		# Retry-After may also be an HTTP date, the default wait is used then
+		return float(retry_after) if retry_after.isdigit() else SECONDARY_WAIT
+
+	def rate_limit_wait(self, resource, response):
+		limited = response.status_code in (403, 429)
+		# GraphQL reports an exhausted quota as a 200 with a RATE_LIMITED error
+		if response.status_code == 200 and resource == "graphql" and b'"RATE_LIMITED"' in response.content[:4096]:
+			limited = True
+		if not limited:
+			return None
+
+		retry_after = response.headers.get("Retry-After")
+		remaining = response.headers.get("X-RateLimit-Remaining")
+		if remaining == "0":
+			# Primary limit: wait for the window reset
+			reset = int(response.headers.get("X-RateLimit-Reset", time.time() + SECONDARY_WAIT))
+			return max(reset - time.time(), 0) + 1
+		if retry_after is not None or b"secondary rate limit" in response.content.lower():
+			# Secondary limit: back off and halve the requests in flight
+			self.secondary_hits += 1
+			self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+			self.bucket(resource).rate = max(self.bucket(resource).rate / 2, 0.5)
+			return float(retry_after) if retry_after is not None else SECONDARY_WAIT * self.secondary_hits
+		# A plain 403 (permissions, not found for private repos) is the caller's business
+		return None
+
+	def adapt(self, resource):
+		remaining, limit, reset = self.limits[resource]
+		if limit <= 0:
+			return
+		headroom = remaining / limit
+		bucket = self.bucket(resource)
+
+		if headroom < LOW_HEADROOM:
+			# Spread what is left over the time until the reset, with fewer requests in flight
+			seconds_left = max(reset - time.time(), 1)
+			bucket.rate = max(remaining / seconds_left, 0.1)
+			self.concurrency = max(self.min_concurrency, self.concurrency - 1)
+		elif headroom > HIGH_HEADROOM:
+			bucket.rate = min(bucket.rate * 1.1, self.default_rate)
+			if self.concurrency < self.max_concurrency:
+				self.concurrency += 1
+				self.condition.notify_all()
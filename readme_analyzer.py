@@ -0,0 +1,89 @@
+"""
+Single pass analysis of an example README.md
+
+Everything the dashboard shows about an example comes from one README download:
+the level 1 header and the shields.io badges at the top of the file, e.g.
+
+	# Bluetooth - Air Quality Monitor #
+	![Type badge](https://img.shields.io/badge/Type-Virtual%20Application-green)
+	![Type badge](https://img.shields.io/badge/Smart%20Buildings-salmon)
+	![Technology badge](https://img.shields.io/badge/Technology-Bluetooth-green)
+	[![Required board](https://img.shields.io/badge/Mikroe-BUZZ%202%20click-green)](https://...)
+
+The salmon coloured badges are the application types of the example.
+"""
+
+import re
+from urllib.parse import unquote
+
+# Static badge: badge/<label>-<message>-<color> or badge/<message>-<color>, then an optional .svg and ?style=... query.
+# \S keeps a badge on its line, a lazy match over several lines would swallow the next badges.
+BADGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(https?://img\.shields\.io/badge/(\S+?)-([0-9A-Za-z]+)(?:\.svg)?(?:\?[^)\s]*)?\)')
+HEADER_PATTERN = re.compile(r'(?m)^# (.+)')
+
+APP_TYPE_COLOR = "salmon"
+BOARD_ALT = "Required board"
+
+# Badge label -> key in the analysis record
+BADGE_FIELDS = {
+	'Type': 'type',
+	'Technology': 'technology',
+	'License': 'license',
+	'SDK': 'sdk',
+	'Build': 'build',
+	'Flash': 'flash',
+	'RAM': 'ram',
+}
+
+def decode_badge_text(text):
+	# shields.io escapes: "--" is a dash, "__" an underscore, "_" a space
+	text = unquote(text).replace("--", "\0").replace("__", "\1").replace("_", " ")
+	return text.replace("\0", "-").replace("\1", "_")
+
+def parse_badge(alt, path, color):
+	parts = re.split(r'(?<!-)-(?!-)', path, maxsplit=1)
+	if len(parts) == 2:
+		label, message = parts
+	else:
+		label, message = "", parts[0]
+	return {
+		'alt': alt,
+		'label': decode_badge_text(label),
+		'message': decode_badge_text(message),
+		'color': color,
+	}
+
+def analyze_readme(content):
+	"""
+	Returns the structured record of a README:
+		title      level 1 header, None when there is none
+		app_types  messages of the salmon badges
+		type, technology, license, sdk, build, flash, ram   message of that badge or None
+		boards     required boards as "<vendor> <board>"
+		badges     every badge found, in file order
+	"""
+	analysis = {
+		'title': None,
+		'app_types': [],
+		'boards': [],
+		'badges': [],
+	}
+	for key in BADGE_FIELDS.values():
+		analysis[key] = None
+
+	headers = HEADER_PATTERN.findall(content)
+	if headers:
+		analysis["title"] = headers[0].replace("#", "").strip()
+
+	for alt, path, color in BADGE_PATTERN.findall(content):
+		badge = parse_badge(alt, path, color)
+		analysis["badges"].append(badge)
+
+		if color == APP_TYPE_COLOR:
+			analysis["app_types"].append(badge["message"])
+		elif alt == BOARD_ALT:
+			analysis["boards"].append(f"{badge['label']} {badge['message']}".strip())
+		elif badge["label"] in BADGE_FIELDS and analysis[BADGE_FIELDS[badge["label"]]] is None:
+			analysis[BADGE_FIELDS[badge["label"]]] = badge["message"]
+
+	return analysis
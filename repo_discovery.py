@@ -0,0 +1,48 @@
+"""
+Repositories of the configured GitHub organizations (generate_dashboard.py --discover-org)
+
+The organizations are listed with github_graphql.got_organization_repositories and
+filtered by topic, name pattern or the presence of a templates.xml. The repos kept
+are merged with the hand curated data/repository_info.json: a curated entry keeps
+its name, tech, examples_folder and extension, a discovered repo without one gets
+defaults derived from its name.
+"""
+
+import fnmatch
+
+DEFAULT_TECH = "Other"
+
+def matches(repo, topics=(), name_patterns=(), with_templates=False):
+	"""True when the repo has one of the topics, matches one of the patterns or has a templates.xml."""
+	if repo["archived"] or repo["fork"]:
+		return False
+	if not topics and not name_patterns and not with_templates:
+		return True
+	if set(topics) & set(repo["topics"]):
+		return True
+	if any(fnmatch.fnmatch(repo["name"].lower(), pattern.lower()) for pattern in name_patterns):
+		return True
+	return with_templates and repo["templates_sha"] is not None
+
+def display_name(repo_name):
+	# bluetooth_applications -> Bluetooth Applications
+	return " ".join(word.capitalize() for word in repo_name.replace("-", "_").split("_") if word)
+
+def merge_repo_infos(curated, discovered):
+	"""
+	Curated entries first and in file order, then the discovered repos that are not
+	curated, by name. Urls are compared case-insensitively, GitHub ignores the case.
+	"""
+	known = {repo_info["url"].rstrip("/").lower() for repo_info in curated}
+	repo_infos = list(curated)
+	for repo in sorted(discovered, key=lambda repo: repo["name"].lower()):
+		if repo["url"].rstrip("/").lower() in known:
+			continue
+		known.add(repo["url"].rstrip("/").lower())
+		repo_infos.append({
+			'name': display_name(repo["name"]),
+			'tech': DEFAULT_TECH,
+			'url': repo["url"],
+			'examples_folder': "",
+		})
+	return repo_infos
@@ -0,0 +1,63 @@
+"""
+Search index of the examples, built while the generator has them in memory
+
+The index is written with the other dashboard payloads:
+	search/docs.json    {"docs": [[name, url, app_types, technology], ...], "shards": [...]}
+	search/<c>.json     {"tokens": [sorted tokens starting with c], "postings": [[doc ids], ...]}
+
+Tokens come from the example title, its application types and the README badges
+(type, technology, sdk, boards). A query word is looked up as a prefix in the shard
+of its first character, so the page only downloads the shards the query needs.
+"""
+
+import re
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+SHARD_CHARS = set("abcdefghijklmnopqrstuvwxyz0123456789")
+# Shard of the tokens starting with any other character
+OTHER_SHARD = "_"
+
+def tokenize(text):
+	# Same split as the page: runs of letters and digits, lower case
+	return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def shard_key(token):
+	return token[0] if token[0] in SHARD_CHARS else OTHER_SHARD
+
+def searchable_text(doc, badges):
+	name, url, app_types, technology = doc
+	fields = [name, technology, badges.get("type"), badges.get("sdk")]
+	fields.extend(app_types)
+	fields.extend(badges.get("boards") or [])
+	return " ".join(field for field in fields if field)
+
+def build_search_index(examples):
+	"""Returns the search payloads, keyed by their name under the payload directory."""
+	# An example is listed once per application type, it is one document of the index
+	docs = []
+	doc_badges = []
+	doc_ids = {}
+	for exp in examples:
+		doc_id = doc_ids.get(exp["example_url"])
+		if doc_id is None:
+			badges = exp.get("badges") or {}
+			doc_id = doc_ids[exp["example_url"]] = len(docs)
+			docs.append([exp["example_name"], exp["example_url"], [], badges.get("technology") or ""])
+			doc_badges.append(badges)
+		docs[doc_id][2].append(exp["app_type"])
+
+	postings = {}
+	for doc_id, (doc, badges) in enumerate(zip(docs, doc_badges)):
+		for token in set(tokenize(searchable_text(doc, badges))):
+			postings.setdefault(token, []).append(doc_id)
+
+	shards = {}
+	for token in sorted(postings):
+		shard = shards.setdefault(shard_key(token), {'tokens': [], 'postings': []})
+		shard["tokens"].append(token)
+		shard["postings"].append(postings[token])
+
+	payloads = {'search/docs': {'docs': docs, 'shards': sorted(shards)}}
+	for key, shard in shards.items():
+		payloads[f"search/{key}"] = shard
+	return payloads
@@ -0,0 +1,58 @@
+"""
+Results computed from git objects, keyed by their sha and kept between runs
+
+A tree sha names its content exactly, so whatever was derived from it (an
+extension histogram) holds for every repo, branch and run that meets the same
+sha. Entries not used for CACHE_MAX_AGE are dropped on save.
+"""
+
+import json
+import time
+import threading
+from fileutil import write_atomic
+
+# Bumped whenever the layout of the file changes
+CACHE_VERSION = 1
+
+# Entries not used for this long are dropped, old revisions of the files
+CACHE_MAX_AGE = 30 * 24 * 3600
+
+class ShaCache:
+	"""sha -> JSON value, kept in a JSON file between runs (in memory only without a path)."""
+	def __init__(self, path=None):
+		self.path = path
+		self.lock = threading.Lock()
+		# sha -> {'used': timestamp, 'value': ...}
+		self.entries = {}
+		self.hits = 0
+		self.misses = 0
+		if path is not None:
+			try:
+				with open(path, "r") as f:
+					data = json.load(f)
+				if data.get("version") == CACHE_VERSION:
+					self.entries = data.get("entries", {})
+			except (OSError, ValueError):
+				pass
+
+	def get(self, sha):
+		with self.lock:
+			entry = self.entries.get(sha)
+			if entry is None:
+				self.misses += 1
+				return None
+			self.hits += 1
+			entry["used"] = time.time()
+			return entry["value"]
+
+	def put(self, sha, value):
+		with self.lock:
+			self.entries[sha] = {'used': time.time(), 'value': value}
+
+	def save(self):
+		if self.path is None:
+			return
+		oldest = time.time() - CACHE_MAX_AGE
+		with self.lock:
+			entries = {sha: entry for sha, entry in self.entries.items() if entry["used"] >= oldest}
+		write_atomic(self.path, json.dumps({'version': CACHE_VERSION, 'entries': entries}))
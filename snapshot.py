@@ -0,0 +1,72 @@
+"""
+Per repository scan snapshots, saved after every run
+
+A snapshot keeps the head sha of the scanned branch together with what was
+extracted at that commit (examples per folder, num_examples, release). When the
+head sha has not moved the next run reuses it instead of scanning the repo again.
+A snapshot also records how the repo was scanned (scan_fingerprint): after an edit
+of repository_info.json it no longer matches and the repo is scanned from scratch.
+"""
+
+import json
+from fileutil import write_atomic
+
+# Bumped whenever the stored example records change shape
+SNAPSHOT_VERSION = 2
+
+def snapshot_key(repo_url, branch):
+	return f"{repo_url}@{branch}"
+
+def load_snapshots(path):
+	try:
+		with open(path, "r") as f:
+			data = json.load(f)
+	except (OSError, ValueError):
+		return {}
+	# Snapshots written by another layout are dropped, the repos are simply rescanned
+	if data.get("version") != SNAPSHOT_VERSION:
+		return {}
+	return data.get("repos", {})
+
+def save_snapshots(path, snapshots):
+	write_atomic(path, json.dumps({'version': SNAPSHOT_VERSION, 'repos': snapshots}))
+
+def scan_fingerprint(repo_info, excluded):
+	"""The inputs of a repo scan besides its commit, a snapshot only holds for the same ones."""
+	return {
+		'examples_folder': repo_info.get("examples_folder"),
+		'extension': repo_info.get("extension"),
+		'excluded': sorted(excluded),
+	}
+
+def matching_snapshot(snapshots, repo_url, repo_meta, fingerprint):
+	if not repo_meta.get("head_sha"):
+		return None
+	snapshot = snapshots.get(snapshot_key(repo_url, repo_meta["default_branch"]))
+	if snapshot is None or snapshot.get("scan") != fingerprint:
+		return None
+	return snapshot
+
+def unchanged_snapshot(snapshots, repo_url, repo_meta, fingerprint):
+	"""The stored snapshot when the branch head is still the scanned commit, else None."""
+	snapshot = matching_snapshot(snapshots, repo_url, repo_meta, fingerprint)
+	if snapshot is None or snapshot["head_sha"] != repo_meta["head_sha"]:
+		return None
+	return snapshot
+
+def previous_snapshot(snapshots, repo_url, repo_meta, fingerprint):
+	"""The stored snapshot of the same branch at an older head, the base of an incremental rescan."""
+	snapshot = matching_snapshot(snapshots, repo_url, repo_meta, fingerprint)
+	if snapshot is None or snapshot["head_sha"] == repo_meta["head_sha"]:
+		return None
+	return snapshot
+
+def build_snapshot(repo_meta, fingerprint, num_examples, folders):
+	return {
+		'head_sha': repo_meta["head_sha"],
+		'branch': repo_meta["default_branch"],
+		'scan': fingerprint,
+		'num_examples': num_examples,
+		'release_ver': repo_meta["release_ver"],
+		'folders': folders,
+	}
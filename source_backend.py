@@ -0,0 +1,221 @@
+"""
+Source backends: where generate_dashboard.py reads repository files and trees from
+
+RestBackend       raw.githubusercontent.com files + Trees API, one HTTP request per file
+GitMirrorBackend  bare partial clones (blob:none) kept under a mirror directory,
+                  only README.md and templates.xml blobs are downloaded, files and
+                  trees are read straight from the local object store
+
+Both return trees in the Trees API format ({"sha", "truncated", "tree": [...]}).
+"""
+
+import os
+import io
+import json
+import base64
+import posixpath
+import subprocess
+import threading
+
+# The compare endpoint lists at most 300 files, a longer diff is treated as unknown
+COMPARE_MAX_FILES = 300
+
+def is_sparse_path(path):
+	"""Files the scan reads, the only blobs a mirror downloads."""
+	name = posixpath.basename(path)
+	return name == "README.md" or name.endswith("templates.xml")
+
+class RestBackend:
+	def __init__(self, client):
+		# GithubClient, all requests share its pooled session and cache
+		self.client = client
+
+	def update(self, owner, repo, ref):
+		pass
+
+	def prefetch(self, owner, repo, ref, paths):
+		pass
+
+	def read_file(self, owner, repo, ref, path):
+		"""Text of a file at ref, None when it does not exist."""
+		url = f"{self.client.raw_url}/{owner}/{repo}/{ref}/{path}"
+		response = self.client.get(url)
+		if response.status_code != 200:
+			return None
+		return response.text
+
+	def open_file(self, owner, repo, ref, path):
+		"""Binary stream of a file at ref, read as it arrives, None when it does not exist."""
+		url = f"{self.client.raw_url}/{owner}/{repo}/{ref}/{path}"
+		response = self.client.stream(url)
+		if response.status_code != 200:
+			response.close()
+			return None
+		return response.raw
+
+	def list_tree(self, owner, repo, ref):
+		url = f"{self.client.api_url}/repos/{owner}/{repo}/git/trees/{ref}?recursive=1"
+		response = self.client.get(url)
+		if response.status_code != 200:
+			return None
+		return response.json()
+
+	def open_tree(self, owner, repo, ref, recursive=True):
+		"""Streamed Trees API response of ref, None when it can not be listed."""
+		url = f"{self.client.api_url}/repos/{owner}/{repo}/git/trees/{ref}" + ("?recursive=1" if recursive else "")
+		response = self.client.stream(url)
+		if response.status_code != 200:
+			response.close()
+			return None
+		return response.raw
+
+	def changed_paths(self, owner, repo, base, head):
+		"""Paths changed from base to head, None when the compare can not tell (rescan everything)."""
+		url = f"{self.client.api_url}/repos/{owner}/{repo}/compare/{base}...{head}"
+		response = self.client.get(url)
+		if response.status_code != 200:
+			return None
+		data = response.json()
+		# base must be an ancestor of head, after a force push the diff would miss files
+		files = data.get("files", [])
+		if data.get("status") not in ("ahead", "identical") or len(files) >= COMPARE_MAX_FILES:
+			return None
+
+		paths = set()
+		for item in files:
+			paths.add(item["filename"])
+			if item.get("previous_filename"):
+				paths.add(item["previous_filename"])
+		return paths
+
+class GitMirrorBackend:
+	def __init__(self, mirror_dir, url_template="https://github.com/{owner}/{repo}.git", token=None):
+		self.mirror_dir = mirror_dir
+		# A file:///path/{owner}/{repo}.git template points the backend at local bare repos
+		self.url_template = url_template
+		self.token = token
+		self.lock = threading.Lock()
+		# (owner, repo) -> lock held while the mirror is set up and fetched
+		self.repo_locks = {}
+
+	def mirror_path(self, owner, repo):
+		return os.path.join(self.mirror_dir, owner, repo + ".git")
+
+	def git(self, owner, repo, *args, check=True):
+		command = ["git"]
+		if self.token:
+			# Sent as a header so the token is never written into the mirror config
+			basic = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+			command += ["-c", f"http.extraHeader=Authorization: Basic {basic}"]
+		command += ["-C", self.mirror_path(owner, repo)] + list(args)
+		env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+		result = subprocess.run(command, capture_output=True, env=env)
+		if check and result.returncode != 0:
+			raise Exception(f"git {' '.join(args[:2])} failed for {owner}/{repo}: {result.stderr.decode(errors='replace')}")
+		return result
+
+	def repo_lock(self, owner, repo):
+		with self.lock:
+			return self.repo_locks.setdefault((owner, repo), threading.Lock())
+
+	def update(self, owner, repo, ref):
+		"""Clone the mirror on first use, afterwards an incremental fetch, then pull the README/templates blobs of ref."""
+		# Branch scans of one run update the same mirror concurrently (--matrix)
+		with self.repo_lock(owner, repo):
+			self.update_mirror(owner, repo, ref)
+
+	def update_mirror(self, owner, repo, ref):
+		path = self.mirror_path(owner, repo)
+		url = self.url_template.format(owner=owner, repo=repo)
+		if not os.path.isdir(path):
+			os.makedirs(path)
+			self.git(owner, repo, "init", "--bare", "--quiet")
+			self.git(owner, repo, "remote", "add", "origin", url)
+			self.git(owner, repo, "config", "remote.origin.promisor", "true")
+			self.git(owner, repo, "config", "remote.origin.partialclonefilter", "blob:none")
+			self.git(owner, repo, "config", "remote.origin.tagopt", "--no-tags")
+		self.git(owner, repo, "fetch", "--quiet", "--prune", "--filter=blob:none", "origin", "+refs/heads/*:refs/heads/*")
+
+		tree = self.list_tree(owner, repo, ref)
+		if tree is not None:
+			paths = [item["path"] for item in tree["tree"] if item["type"] == "blob" and is_sparse_path(item["path"])]
+			self.prefetch(owner, repo, ref, paths)
+
+	def missing_blobs(self, owner, repo, ref):
+		# --missing=print lists the blobs of the commit that are not local yet, without fetching them
+		result = self.git(owner, repo, "rev-list", "--objects", "--no-walk", "--missing=print", self.resolve(owner, repo, ref))
+		return {line[1:].strip() for line in result.stdout.decode().splitlines() if line.startswith("?")}
+
+	def prefetch(self, owner, repo, ref, paths):
+		"""Download the blobs of the given paths in one fetch instead of one lazy fetch per file."""
+		tree = self.list_tree(owner, repo, ref)
+		if tree is None:
+			return
+		wanted = {item["sha"] for item in tree["tree"] if item["type"] == "blob" and item["path"] in set(paths)}
+		missing = sorted(wanted & self.missing_blobs(owner, repo, ref))
+		if missing:
+			self.git(owner, repo, "fetch", "--quiet", "--no-write-fetch-head", "origin", *missing)
+
+	def resolve(self, owner, repo, ref):
+		"""Commit sha of a branch name or sha, None when the mirror does not know it."""
+		for name in (f"refs/heads/{ref}", ref):
+			result = self.git(owner, repo, "rev-parse", "--verify", "--quiet", f"{name}^{{commit}}", check=False)
+			if result.returncode == 0:
+				return result.stdout.decode().strip()
+		return None
+
+	def changed_paths(self, owner, repo, base, head):
+		base_commit = self.resolve(owner, repo, base)
+		head_commit = self.resolve(owner, repo, head)
+		if base_commit is None or head_commit is None:
+			return None
+		if self.git(owner, repo, "merge-base", "--is-ancestor", base_commit, head_commit, check=False).returncode != 0:
+			return None
+		result = self.git(owner, repo, "diff", "--name-only", "--no-renames", "-z", base_commit, head_commit)
+		return {path for path in result.stdout.decode("utf-8", errors="replace").split("\0") if path}
+
+	def read_file(self, owner, repo, ref, path):
+		commit = self.resolve(owner, repo, ref)
+		if commit is None:
+			return None
+		# The REST paths are joined as scan_in_folder + "/" + folder, so they may start with "/"
+		path = posixpath.normpath(path).lstrip("/")
+		result = self.git(owner, repo, "cat-file", "blob", f"{commit}:{path}", check=False)
+		if result.returncode != 0:
+			return None
+		return result.stdout.decode("utf-8", errors="replace")
+
+	def open_file(self, owner, repo, ref, path):
+		commit = self.resolve(owner, repo, ref)
+		if commit is None:
+			return None
+		path = posixpath.normpath(path).lstrip("/")
+		result = self.git(owner, repo, "cat-file", "blob", f"{commit}:{path}", check=False)
+		if result.returncode != 0:
+			return None
+		# The blob is in the local object store already, nothing to stream from
+		return io.BytesIO(result.stdout)
+
+	def open_tree(self, owner, repo, ref, recursive=True):
+		tree = self.list_tree(owner, repo, ref, recursive)
+		if tree is None:
+			return None
+		# Local listings are never truncated, the Trees API format keeps one reader for both backends
+		return io.BytesIO(json.dumps(tree).encode("utf-8"))
+
+	def list_tree(self, owner, repo, ref, recursive=True):
+		commit = self.resolve(owner, repo, ref)
+		if commit is None:
+			return None
+		tree_sha = self.git(owner, repo, "rev-parse", f"{commit}^{{tree}}").stdout.decode().strip()
+		flags = ["-r", "-t"] if recursive else []
+		result = self.git(owner, repo, "ls-tree", *flags, "--full-tree", "-z", commit)
+
+		entries = []
+		for line in result.stdout.decode("utf-8", errors="replace").split("\0"):
+			if not line:
+				continue
+			info, path = line.split("\t", 1)
+			mode, type, sha = info.split()
+			entries.append({'path': path, 'mode': mode, 'type': type, 'sha': sha})
+		return {'sha': tree_sha, 'truncated': False, 'tree': entries}
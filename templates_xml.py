@@ -0,0 +1,57 @@
+"""
+Streaming reader of the Simplicity Studio templates.xml descriptors
+
+	<model:MDescriptors ...>
+	  <descriptors name="..." label="Bluetooth - Example">
+	    <properties key="readmeFiles" value="example/README.md"/>
+	    <properties key="projectFilePaths" value="example/example.slcp"/>
+	  </descriptors>
+	  ...
+
+The file is parsed with iterparse straight from the response stream, every
+descriptor is dropped once read, so even files with hundreds of descriptors are
+never held as a whole document tree. generate_dashboard.py keeps the summaries in
+the blob store (blob_store.py) by the git blob sha of the file, an unchanged
+templates.xml is parsed only once, whatever the run or the branch it is found on.
+"""
+
+import xml.etree.ElementTree as ET
+
+def local_name(tag):
+	# "{http://www.silabs.com/ss/Studio.ecore}MDescriptors" -> "MDescriptors"
+	return tag.rsplit("}", 1)[-1]
+
+def iter_descriptors(stream):
+	"""Yield label, readme files and project files of every descriptor of a binary stream."""
+	root = None
+	for event, elem in ET.iterparse(stream, events=("start", "end")):
+		if event == "start":
+			if root is None:
+				root = elem
+			continue
+		if local_name(elem.tag) != "descriptors":
+			continue
+		descriptor = {
+			'label': elem.get("label"),
+			'readme_files': [],
+			'project_files': [],
+		}
+		for prop in elem.iter():
+			if local_name(prop.tag) != "properties" or not prop.get("value"):
+				continue
+			if prop.get("key") == "readmeFiles":
+				descriptor["readme_files"].append(prop.get("value"))
+			elif prop.get("key") == "projectFilePaths":
+				descriptor["project_files"].append(prop.get("value"))
+		yield descriptor
+		# Descriptors already read are released, memory stays bounded by one descriptor
+		root.clear()
+
+def read_templates(stream):
+	"""Summary of a templates.xml: its descriptors and the number of .slcp examples."""
+	descriptors = list(iter_descriptors(stream))
+	num_examples = sum(1 for descriptor in descriptors if any(path.endswith(".slcp") for path in descriptor["project_files"]))
+	return {
+		'descriptors': descriptors,
+		'num_examples': num_examples,
+	}
@@ -0,0 +1,45 @@
+import os
+import pytest
+from readme_analyzer import analyze_readme, parse_badge, decode_badge_text
+
+DOC_README = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "doc", "README.md")
+
+def test_doc_readme():
+	with open(DOC_README, encoding="utf-8") as f:
+		analysis = analyze_readme(f.read())
+	assert analysis["title"] == "Bluetooth - Air Quality Monitor"
+	assert analysis["app_types"] == []
+	assert analysis["type"] == "Virtual Application"
+	assert analysis["technology"] == "Bluetooth"
+	assert analysis["sdk"] == "v2025.6.2"
+	assert analysis["flash"] == "221.68 KB"
+	assert analysis["boards"] == ["Mikroe BUZZ 2 click", "Sparkfun Micro OLED Breakout (Qwiic) board"]
+	assert len(analysis["badges"]) == 9
+
+@pytest.mark.parametrize("suffix", ["", ".svg", "?style=flat", ".svg?style=for-the-badge&logo=bluetooth"])
+def test_app_type_badge_suffixes(suffix):
+	content = f"# Example #\n![Type badge](https://img.shields.io/badge/Smart%20Buildings-salmon{suffix})\n"
+	assert analyze_readme(content)["app_types"] == ["Smart Buildings"]
+
+def test_badges_on_one_line():
+	content = "![Type badge](https://img.shields.io/badge/Health-salmon) ![Type badge](https://img.shields.io/badge/Metering-salmon?style=flat)"
+	assert analyze_readme(content)["app_types"] == ["Health", "Metering"]
+
+def test_no_title():
+	assert analyze_readme("no header\n")["title"] is None
+
+def test_parse_badge_label_and_message():
+	badge = parse_badge("Technology badge", "Technology-Wi--Fi", "green")
+	assert badge["label"] == "Technology"
+	assert badge["message"] == "Wi-Fi"
+
+def test_parse_badge_message_only():
+	badge = parse_badge("Type badge", "Asset%20Tracking", "salmon")
+	assert badge["label"] == ""
+	assert badge["message"] == "Asset Tracking"
+
+def test_decode_badge_text():
+	assert decode_badge_text("Smart_Home") == "Smart Home"
+	assert decode_badge_text("snake__case") == "snake_case"
+	assert decode_badge_text("Wi--Fi") == "Wi-Fi"
+	assert decode_badge_text("BUZZ%202%20click") == "BUZZ 2 click"
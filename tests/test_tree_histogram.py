@@ -0,0 +1,67 @@
+import io
+import json
+import pytest
+from tree_histogram import JsonStream, read_tree, extension_of, merge_histograms
+
+TREE = {
+	'sha': "abc",
+	'url': "https://api.github.com/repos/o/r/git/trees/abc",
+	'tree': [
+		{'path': "README.md", 'type': "blob", 'sha': "1"},
+		{'path': "app", 'type': "tree", 'sha': "2"},
+		{'path': "app/main.c", 'type': "blob", 'sha': "3"},
+		{'path': "app/app.slcp", 'type': "blob", 'sha': "4"},
+		{'path': "app/Makefile", 'type': "blob", 'sha': "5"},
+		{'path': "doc/été ☃.md", 'type': "blob", 'sha': "6"},
+		{'path': "doc/quote\"and\\\\slash.md", 'type': "blob", 'sha': "7"},
+	],
+	'truncated': False,
+}
+
+def tree_bytes(ensure_ascii):
+	return json.dumps(TREE, ensure_ascii=ensure_ascii, indent=1).encode("utf-8")
+
+def test_read_tree():
+	result = read_tree(io.BytesIO(tree_bytes(False)))
+	assert result["sha"] == "abc"
+	assert result["truncated"] is False
+	assert result["histogram"] == {'md': 3, 'c': 1, 'slcp': 1}
+	assert result["subtrees"] == [("app", "2")]
+
+@pytest.mark.parametrize("ensure_ascii", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+def test_chunk_boundaries(chunk_size, ensure_ascii):
+	# Small chunks split the multi byte characters and the \" \\ \uXXXX escapes
+	reader = JsonStream(io.BytesIO(tree_bytes(ensure_ascii)), chunk_size=chunk_size)
+	value = {}
+	for key in reader.members():
+		if key == "tree":
+			value[key] = list(reader.items())
+		else:
+			value[key] = reader.value()
+	assert value == TREE
+
+def test_number_at_chunk_end():
+	reader = JsonStream(io.BytesIO(b'[12345, 6]'), chunk_size=3)
+	assert list(reader.items()) == [12345, 6]
+
+def test_empty_containers():
+	reader = JsonStream(io.BytesIO(b'{"tree": [], "truncated": true}'), chunk_size=4)
+	result = {}
+	for key in reader.members():
+		result[key] = list(reader.items()) if key == "tree" else reader.value()
+	assert result == {'tree': [], 'truncated': True}
+
+def test_truncated_document():
+	reader = JsonStream(io.BytesIO(b'{"sha": "ab'), chunk_size=4)
+	with pytest.raises(ValueError):
+		for key in reader.members():
+			reader.value()
+
+def test_extension_of():
+	assert extension_of("a/b/c.tar.gz") == "gz"
+	assert extension_of("a.b/Makefile") is None
+	assert extension_of(".gitignore") == "gitignore"
+
+def test_merge_histograms():
+	assert merge_histograms([{'c': 1}, {'c': 2, 'h': 1}]) == {'c': 3, 'h': 1}
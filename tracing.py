@@ -0,0 +1,67 @@
+"""
+Chrome trace-event export of a dashboard run (generate_dashboard.py --trace)
+
+Every span is a complete event ("ph": "X") of the Trace Event Format, the file
+opens in chrome://tracing or https://ui.perfetto.dev. Spans run on one of:
+- the worker thread that made them (HTTP requests, README and templates.xml parses)
+- a named track: the phases of the run, and one track per repo for its stages,
+  which are coroutines interleaved on the event loop thread
+"""
+
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+PID = 1
+
+class Tracer:
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.origin = time.perf_counter()
+		self.events = []
+		# thread ident or track name -> tid of the trace
+		self.tids = {}
+
+	def tid(self, key, name):
+		with self.lock:
+			if key not in self.tids:
+				self.tids[key] = len(self.tids) + 1
+				self.events.append({'name': "thread_name", 'ph': "M", 'pid': PID, 'tid': self.tids[key], 'args': {'name': name}})
+			return self.tids[key]
+
+	def add(self, name, category, start, seconds, track=None, args=None):
+		"""Add a span that started at `start` (perf_counter) and lasted `seconds`."""
+		if track is None:
+			thread = threading.current_thread()
+			tid = self.tid(thread.ident, thread.name)
+		else:
+			tid = self.tid(("track", track), track)
+		event = {
+			'name': name,
+			'cat': category,
+			'ph': "X",
+			'ts': round((start - self.origin) * 1e6, 1),
+			'dur': round(seconds * 1e6, 1),
+			'pid': PID,
+			'tid': tid,
+		}
+		if args:
+			event["args"] = args
+		with self.lock:
+			self.events.append(event)
+
+	@contextmanager
+	def span(self, name, category, track=None, **args):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add(name, category, start, time.perf_counter() - start, track, args)
+
+	def write(self, path):
+		with self.lock:
+			events = list(self.events)
+		with open(path, "w") as f:
+			json.dump({'traceEvents': events, 'displayTimeUnit': "ms"}, f)
+		return len(events)
@@ -0,0 +1,144 @@
+"""
+File extension histogram of a git tree, read from a streamed Trees API response
+
+A recursive tree response of a big repository is megabytes of JSON. read_tree
+decodes the top level object key by key and the "tree" array one entry at a
+time, so only the histogram and the direct subtrees are kept in memory, never
+the whole listing. generate_dashboard.py caches the histograms by tree sha and,
+when GitHub truncates a listing, rebuilds it from the histograms of the subtrees.
+"""
+
+import json
+import codecs
+import posixpath
+
+CHUNK_SIZE = 64 * 1024
+
+def extension_of(path):
+	name = posixpath.basename(path)
+	if "." not in name:
+		return None
+	return name.rsplit(".", 1)[1]
+
+def merge_histograms(histograms):
+	merged = {}
+	for histogram in histograms:
+		for ext, count in histogram.items():
+			merged[ext] = merged.get(ext, 0) + count
+	return merged
+
+class JsonStream:
+	"""Incremental reader of one JSON document, values are decoded as soon as they are complete."""
+	def __init__(self, stream, chunk_size=CHUNK_SIZE):
+		self.stream = stream
+		self.chunk_size = chunk_size
+		self.decoder = json.JSONDecoder()
+		self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+		self.buffer = ""
+		self.pos = 0
+		self.eof = False
+
+	def fill(self):
+		if self.eof:
+			return False
+		chunk = self.stream.read(self.chunk_size)
+		if not chunk:
+			self.eof = True
+			self.buffer += self.text_decoder.decode(b"", final=True)
+			return False
+		# Drop what was consumed so the buffer stays about one chunk long
+		self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk)
+		self.pos = 0
+		return True
+
+	def peek(self):
+		"""Next non blank character, '' at the end of the document."""
+		while True:
+			while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+				self.pos += 1
+			if self.pos < len(self.buffer):
+				return self.buffer[self.pos]
+			if not self.fill():
+				return ""
+
+	def expect(self, char):
+		if self.peek() != char:
+			raise ValueError(f"Expected {char!r} at {self.pos} of the tree response")
+		self.pos += 1
+
+	def value(self):
+		self.peek()
+		while True:
+			try:
+				value, end = self.decoder.raw_decode(self.buffer, self.pos)
+			except json.JSONDecodeError:
+				# Value not complete yet
+				if not self.fill():
+					raise
+				continue
+			# A number at the end of the buffer may go on in the next chunk
+			if end == len(self.buffer) and self.fill():
+				continue
+			self.pos = end
+			return value
+
+	def members(self):
+		"""Yield the keys of the current object, the caller reads each value."""
+		self.expect("{")
+		if self.peek() == "}":
+			self.pos += 1
+			return
+		while True:
+			key = self.value()
+			self.expect(":")
+			yield key
+			if self.peek() == ",":
+				self.pos += 1
+				continue
+			self.expect("}")
+			return
+
+	def items(self):
+		"""Yield the values of the current array."""
+		self.expect("[")
+		if self.peek() == "]":
+			self.pos += 1
+			return
+		while True:
+			yield self.value()
+			if self.peek() == ",":
+				self.pos += 1
+				continue
+			self.expect("]")
+			return
+
+def read_tree(stream):
+	"""
+	Returns from a Trees API response stream:
+		sha        sha of the tree
+		truncated  True when GitHub left entries out of the listing
+		histogram  extension -> number of files
+		subtrees   (path, sha) of the direct subtrees
+	"""
+	reader = JsonStream(stream)
+	result = {
+		'sha': None,
+		'truncated': False,
+		'histogram': {},
+		'subtrees': [],
+	}
+	histogram = result["histogram"]
+	for key in reader.members():
+		if key != "tree":
+			value = reader.value()
+			if key in ("sha", "truncated"):
+				result[key] = value
+			continue
+		for item in reader.items():
+			if item["type"] == "blob":
+				ext = extension_of(item["path"])
+				if ext is not None:
+					histogram[ext] = histogram.get(ext, 0) + 1
+			elif item["type"] == "tree" and "/" not in item["path"]:
+				result["subtrees"].append((item["path"], item["sha"]))
+	return result
@@ -262,7 +262,7 @@ def got_type_shield_io(owner, repo, default_branch, readme_path):
 		print("Failed to passing API in got_type_shield_io() for repo: {0}, folder: {1}".format(repo, folder))
 		# sys.exit(1)
 
-import xml.etree.ElementTree as ET
+from templates_xml import iter_descriptors
 def get_readme_label_pairs(owner, repo, default_branch, scan_in_folder):
 	pairs = []
 
@@ -271,22 +271,16 @@ def get_readme_label_pairs(owner, repo, default_branch, scan_in_folder):
 	else:
 		url = f'https://api.github.com/repos/{owner}/{repo}/contents/templates.xml?ref={default_branch}'
 
-	response = requests.get(url, headers=api_headers)
+	response = requests.get(url, headers=api_headers, stream=True)
 	if response.status_code == 200:	
-		contents = response.text
+		response.raw.decode_content = True
 
 		"""Get label and readme file pairs in a compact format"""
-		tree = ET.ElementTree(ET.fromstring(contents))
-		root = tree.getroot()
-		
-		
-		for desc in root.findall('.//descriptors'):
-			label = desc.get('label', 'No label')
-			readme_prop = desc.find('.//properties[@key="readmeFiles"]')
-			if readme_prop is not None:
-				readme_file = readme_prop.get('value')
-				if readme_file:
-					pairs.append((label, readme_file))
+		# Descriptors are read as the file streams in, the document is never built as a whole
+		for desc in iter_descriptors(response.raw):
+			label = desc["label"] or 'No label'
+			if desc["readme_files"]:
+				pairs.append((label, desc["readme_files"][0]))
 
 	else:
 		print("This repo did not contain templates.xml:", repo)